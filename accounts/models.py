@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -43,6 +44,16 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(
+                fields=["first_name"], name="user_first_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+            GinIndex(
+                fields=["last_name"], name="user_last_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ]
+
     # @property
     # def profile_url(self):
     #     hex_name = self.get_full_name().encode().hex()
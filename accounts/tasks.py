@@ -1,14 +1,14 @@
 from datetime import timedelta
 
+from core.queues import TaskPriority, db_periodic_task, task
 from django.utils import timezone
 from huey import crontab
-from huey.contrib.djhuey import db_periodic_task, db_task
 
 from .models import User
 from .utils import send_activation_email, send_password_reset_email
 
 
-@db_periodic_task(crontab(hour="*/6"))
+@db_periodic_task("maintenance", crontab(hour="*/6"), priority=TaskPriority.LOW)
 def delete_unverified_accounts():
     grace_period = timezone.now() - timedelta(hours=24)
     unverified_users = User.objects.filter(
@@ -16,11 +16,12 @@ def delete_unverified_accounts():
     ).delete()
 
 
-@db_task()
-def send_async_account_activation_mail(user_pk, request):
-    send_activation_email(user_pk, request)
+# Plain tasks, emails are sent from greenlets that must not hold database connections.
+@task("notifications")
+def send_async_account_activation_mail(recipient, url):
+    send_activation_email(recipient, url)
 
 
-@db_task()
-def send_async_password_reset_mail(email, request):
-    send_password_reset_email(email, request)
+@task("notifications")
+def send_async_password_reset_mail(recipient, url):
+    send_password_reset_email(recipient, url)
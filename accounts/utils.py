@@ -1,4 +1,5 @@
 from logging import getLogger
+from typing import Dict
 
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
@@ -24,41 +25,40 @@ def get_email_activation_url(user, request):
     return url
 
 
-def send_activation_email(user_pk: int, url):
+def get_mail_recipient(user) -> Dict[str, str]:
+    """Returns what emails to `user` are rendered with, so that sending them needs no query."""
+    return {
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+def send_activation_email(recipient: Dict[str, str], url):
     """Utility function to send activation emails."""
-    logger.info(f"Sending activation email to: {user_pk}")
-    try:
-        user = User.objects.get(pk=user_pk)
-    except User.DoesNotExist:
-        logger.warning(f"EMAIL ERROR: User does not exist -> {user_pk}")
-        pass
+    logger.info(f"Sending activation email to: {recipient['username']}")
 
     subject = "[Giveaway] Please Activate Your Account"
     html_content = render_to_string(
         "accounts/emails/account_activation.html",
         {
-            "first_name": user.first_name,
-            "last_name": user.last_name,
+            "first_name": recipient["first_name"],
+            "last_name": recipient["last_name"],
             "url": url,
         },
     )
 
-    mail = EmailMultiAlternatives(subject, to=[user.email])
+    mail = EmailMultiAlternatives(subject, to=[recipient["email"]])
     mail.attach_alternative(html_content, "text/html")
 
     mail.send()
-    logger.info(f"Activation email successfully sent to -> {user.username}")
+    logger.info(f"Activation email successfully sent to -> {recipient['username']}")
 
 
-def get_password_reset_url(email, request):
+def get_password_reset_url(user, request):
     """Returns the URL to reset a user's password."""
 
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        logger.warning(f"EMAIL ERROR: User does not exist -> {email}")
-        user = None
-
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     token = account_activation_token.make_token(user)
 
@@ -69,31 +69,25 @@ def get_password_reset_url(email, request):
     return url
 
 
-def send_password_reset_email(email: str, url):
+def send_password_reset_email(recipient: Dict[str, str], url):
     """Utility function to send password reset emails."""
-    logger.info(f"Sending password reset email to: {email}")
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        logger.warning(f"EMAIL ERROR: User does not exist -> {email}")
-        user = None
+    logger.info(f"Sending password reset email to: {recipient['email']}")
 
-    if user:
-        subject = "[Giveaway] Resest Your Password"
-        html_content = render_to_string(
-            "accounts/emails/reset_password_mail.html",
-            {
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "url": url,
-            },
-        )
-
-        mail = EmailMultiAlternatives(subject, to=[user.email])
-        mail.attach_alternative(html_content, "text/html")
-
-        mail.send()
-        logger.info(f"Password reset email successfully sent to -> {user.username}")
+    subject = "[Giveaway] Resest Your Password"
+    html_content = render_to_string(
+        "accounts/emails/reset_password_mail.html",
+        {
+            "first_name": recipient["first_name"],
+            "last_name": recipient["last_name"],
+            "url": url,
+        },
+    )
+
+    mail = EmailMultiAlternatives(subject, to=[recipient["email"]])
+    mail.attach_alternative(html_content, "text/html")
+
+    mail.send()
+    logger.info(f"Password reset email successfully sent to -> {recipient['username']}")
 
 
 def verify_uid_and_token(uid: str, token: str, type: str):
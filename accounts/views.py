@@ -15,8 +15,14 @@ from django.views import generic
 from django.views.generic.base import TemplateView
 
 from .forms import PasswordResetRequestForm, UserLoginForm, UserRegistrationForm
+from .models import User
 from .tasks import send_async_account_activation_mail, send_async_password_reset_mail
-from .utils import get_email_activation_url, get_password_reset_url, verify_uid_and_token
+from .utils import (
+    get_email_activation_url,
+    get_mail_recipient,
+    get_password_reset_url,
+    verify_uid_and_token,
+)
 
 
 class RegistrationView(SuccessMessageMixin, generic.CreateView):
@@ -35,7 +41,9 @@ class RegistrationView(SuccessMessageMixin, generic.CreateView):
         _ = super().form_valid(form)
 
         activation_url = get_email_activation_url(self.object, self.request)
-        send_async_account_activation_mail.schedule((self.object.pk, activation_url), delay=2)
+        send_async_account_activation_mail.schedule(
+            (get_mail_recipient(self.object), activation_url), delay=2
+        )
 
         return redirect(self.get_success_url())
 
@@ -78,10 +86,14 @@ class ForgotPasswordView(SuccessMessageMixin, generic.FormView):
         return context
 
     def form_valid(self, form) -> HttpResponse:
-        email = form.cleaned_data.get("email")
-
-        password_reset_url = get_password_reset_url(email, self.request)
-        send_async_password_reset_mail.schedule((email, password_reset_url), delay=2)
+        user = User.objects.filter(email=form.cleaned_data.get("email")).first()
+
+        # Unknown addresses get the same response, so that it does not reveal who has an account.
+        if user is not None:
+            password_reset_url = get_password_reset_url(user, self.request)
+            send_async_password_reset_mail.schedule(
+                (get_mail_recipient(user), password_reset_url), delay=2
+            )
 
         return super().form_valid(form)
 
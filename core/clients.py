@@ -0,0 +1,136 @@
+import os
+import threading
+from typing import Dict, Optional
+
+import redis
+import requests
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from requests.adapters import HTTPAdapter
+
+_lock = threading.Lock()
+_redis_pool = None
+_http_session = None
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """A `BlockingConnectionPool` that counts checkouts and the ones that had to wait."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.checkouts = 0
+        self.waits = 0
+        self.peak_in_use = 0
+
+    def get_in_use(self) -> int:
+        idle = sum(connection is not None for connection in list(self.pool.queue))
+        return len(self._connections) - idle
+
+    def get_connection(self, command_name, *keys, **options):
+        in_use = self.get_in_use()
+        self.checkouts += 1
+        if in_use >= self.max_connections:
+            self.waits += 1
+
+        connection = super().get_connection(command_name, *keys, **options)
+        self.peak_in_use = max(self.peak_in_use, in_use + 1)
+
+        return connection
+
+
+def get_redis_pool() -> InstrumentedConnectionPool:
+    global _redis_pool
+
+    if _redis_pool is None:
+        with _lock:
+            if _redis_pool is None:
+                _redis_pool = InstrumentedConnectionPool.from_url(
+                    settings.REDIS_URL,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    timeout=settings.REDIS_POOL_TIMEOUT,
+                    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                )
+    return _redis_pool
+
+
+def get_redis() -> redis.StrictRedis:
+    """Returns a Redis client on the process-wide pool."""
+    return redis.StrictRedis(connection_pool=get_redis_pool())
+
+
+def lazy_redis() -> redis.StrictRedis:
+    """Returns a Redis client that is only created once it is first used.
+
+    Meant for module-level `r = lazy_redis()`, so importing a module opens nothing.
+    """
+    return SimpleLazyObject(get_redis)
+
+
+def get_http_session() -> requests.Session:
+    """Returns the process-wide `requests.Session`.
+
+    It keeps `HTTP_POOL_MAXSIZE` keep-alive connections for each of up to `HTTP_POOL_HOSTS`
+    hosts. Callers pass their own auth headers per request, as the session is shared.
+    """
+    global _http_session
+
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_HOSTS,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def get_pool_stats() -> Dict[str, Optional[dict]]:
+    """Returns utilization counters of the pools this process has created so far."""
+    stats = {"redis": None, "http": None}
+
+    if _redis_pool is not None:
+        stats["redis"] = {
+            "max_connections": _redis_pool.max_connections,
+            "created": len(_redis_pool._connections),
+            "in_use": _redis_pool.get_in_use(),
+            "peak_in_use": _redis_pool.peak_in_use,
+            "checkouts": _redis_pool.checkouts,
+            "waits": _redis_pool.waits,
+        }
+
+    if _http_session is not None:
+        adapter = _http_session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        stats["http"] = {
+            f"{scheme}://{host}:{port}": {
+                "maxsize": pools[key].pool.maxsize,
+                "created": pools[key].num_connections,
+                "requests": pools[key].num_requests,
+            }
+            for key in pools.keys()
+            for scheme, host, port in [(key.key_scheme, key.key_host, key.key_port)]
+        }
+
+    return stats
+
+
+def _reset_after_fork() -> None:
+    global _lock, _http_session
+
+    # Another thread may have held the lock at fork time, and the parent's keep-alive sockets
+    # must not be shared. redis-py already drops inherited connections on the pool's next use.
+    _lock = threading.Lock()
+    _http_session = None
+    if _redis_pool is not None:
+        _redis_pool.reset_counters()
+
+
+# Huey's process workers fork the consumer after the app has been imported.
+os.register_at_fork(after_in_child=_reset_after_fork)
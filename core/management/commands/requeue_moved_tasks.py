@@ -0,0 +1,90 @@
+import datetime
+from typing import Optional
+
+from accounts.models import User
+from accounts.utils import get_mail_recipient
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import autodiscover_modules
+from huey.contrib import djhuey
+
+from core.queues import get_queue
+
+# Email tasks were queued with the user's pk or email before they took the rendered recipient,
+# which greenlets send without touching the database.
+LEGACY_MAIL_LOOKUPS = {
+    "accounts.tasks.send_async_account_activation_mail": "pk",
+    "accounts.tasks.send_async_password_reset_mail": "email",
+}
+
+
+def upgrade_args(message) -> Optional[tuple]:
+    """Returns the args of `message` in the current signature of its task, or None if the task
+    has nothing left to do.
+    """
+    lookup = LEGACY_MAIL_LOOKUPS.get(message.name)
+    if lookup is None or isinstance(message.args[0], dict):
+        return message.args
+
+    user_key, url = message.args
+    user = User.objects.filter(**{lookup: user_key}).first()
+    if user is None:
+        return None
+    return (get_mail_recipient(user), url)
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves tasks left on djhuey's `HUEY` queue by a release that predates `HUEY_QUEUES` onto "
+        "the queue of their workload. Run it with the consumers stopped, before restarting them."
+    )
+
+    def handle(self, *args, **options):
+        autodiscover_modules("tasks")
+
+        legacy = djhuey.HUEY
+        routes = {}
+        for name in settings.HUEY_QUEUES:
+            queue = get_queue(name)
+            if queue is not legacy:
+                routes.update(dict.fromkeys(queue._registry._registry, queue))
+
+        # `HUEY` no longer registers the tasks of other workloads, and would drop them.
+        moved = dropped = 0
+        pending = [legacy.storage.dequeue() for _ in range(legacy.storage.queue_size())]
+        for data in filter(None, pending):
+            message, data = self.upgrade(legacy, data)
+            if message is None:
+                dropped += 1
+                continue
+            queue = routes.get(message.name, legacy)
+            queue.storage.enqueue(data, message.priority)
+            moved += queue is not legacy
+
+        # Delayed tasks and retries wait in the schedule until their eta instead.
+        for data in legacy.storage.read_schedule(datetime.datetime(9999, 1, 1)):
+            message, data = self.upgrade(legacy, data)
+            if message is None:
+                dropped += 1
+                continue
+            queue = routes.get(message.name, legacy)
+            queue.storage.add_to_schedule(data, message.eta or datetime.datetime.fromtimestamp(0))
+            moved += queue is not legacy
+
+        self.stdout.write(
+            f"Moved {moved} task(s) off the {legacy.name!r} queue, "
+            f"dropped {dropped} email(s) to deleted users."
+        )
+
+    def upgrade(self, legacy, data):
+        """Returns the message in `data` and its data in current task signatures, or None for
+        both if the task has nothing left to do.
+        """
+        message = legacy.serializer.deserialize(data)
+        args = upgrade_args(message)
+        if args is None:
+            return None, None
+        if args is not message.args:
+            message = message._replace(args=args)
+            data = legacy.serializer.serialize(message)
+        return message, data
@@ -0,0 +1,49 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+from huey.consumer_options import ConsumerConfig
+
+from core.queues import get_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the consumer of one `HUEY_QUEUES` workload with its own consumer profile, "
+        "e.g. `run_huey_queue payments`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue", choices=settings.HUEY_QUEUES.keys())
+        parser.add_argument("--workers", type=int)
+        parser.add_argument("--worker-type", choices=("thread", "process", "greenlet"))
+
+    def handle(self, *args, **options):
+        consumer_options = dict(settings.HUEY_QUEUES[options["queue"]].get("consumer", {}))
+        if options["workers"]:
+            consumer_options["workers"] = options["workers"]
+        if options["worker_type"]:
+            consumer_options["worker_type"] = options["worker_type"]
+
+        if consumer_options.get("worker_type") == "greenlet":
+            # Patching here would be too late, Django and its clients are already imported.
+            try:
+                from gevent import monkey
+            except ImportError:
+                raise CommandError("Greenlet workers need gevent, run `pip install gevent`.")
+            if not monkey.is_module_patched("socket"):
+                raise CommandError(
+                    "Greenlet workers must be started with `./gevent_manage.py run_huey_queue`."
+                )
+
+        autodiscover_modules("tasks")
+
+        config = ConsumerConfig(**consumer_options)
+        config.validate()
+
+        logger = logging.getLogger("huey")
+        if not logger.handlers:
+            config.setup_logger(logger)
+
+        get_queue(options["queue"]).create_consumer(**config.values).run()
@@ -0,0 +1,130 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Optional, Sequence
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset paginator that never counts or offsets.
+
+    `ordering` must end in a unique field (e.g. `("-created_at", "-id")`) so that every row has
+    a distinct position. Pages are addressed by opaque cursors holding the ordering values of
+    the row they start after (or before, when paginating backwards).
+    """
+
+    def __init__(self, queryset, ordering: Sequence[str], per_page: int):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def encode_cursor(self, obj, direction: str) -> str:
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            # keep full microsecond precision, `DjangoJSONEncoder` truncates to milliseconds.
+            values.append(value.isoformat() if isinstance(value, datetime.datetime) else value)
+
+        data = json.dumps([direction, values], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError, binascii.Error):
+            raise Http404("Invalid cursor")
+
+        if direction not in ("next", "previous") or len(values) != len(self.ordering):
+            raise Http404("Invalid cursor")
+
+        return direction, values
+
+    def get_keyset_filter(self, values, backwards: bool) -> Q:
+        """Builds `(a, b) < (x, y)`-style row comparisons honouring each field's direction."""
+        keyset_filter = Q()
+        equal_so_far = Q()
+
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != backwards
+            lookup = "lt" if descending else "gt"
+
+            keyset_filter |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+            equal_so_far &= Q(**{name: value})
+
+        return keyset_filter
+
+    def page(self, cursor: Optional[str]) -> CursorPage:
+        if not cursor:
+            direction, values = "next", None
+        else:
+            direction, values = self.decode_cursor(cursor)
+
+        backwards = direction == "previous"
+        ordering = self.ordering
+        if backwards:
+            ordering = [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_filter(values, backwards))
+
+        # One extra row tells whether there is a page beyond this one.
+        object_list = list(queryset.order_by(*ordering)[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+
+        if backwards:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        if not object_list:
+            return CursorPage(object_list)
+
+        return CursorPage(
+            object_list,
+            next_cursor=self.encode_cursor(object_list[-1], "next") if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(object_list[0], "previous") if has_previous else None
+            ),
+        )
+
+
+class CursorPaginationMixin:
+    """Swaps `MultipleObjectMixin`'s OFFSET pagination for `CursorPaginator`."""
+
+    cursor_ordering = ("-created_at", "-id")
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, self.cursor_ordering, page_size)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,79 @@
+from enum import IntEnum
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from huey.contrib import djhuey
+
+
+class TaskPriority(IntEnum):
+    """Huey runs higher priorities first among the tasks waiting on the same queue."""
+
+    LOW = 0
+    NORMAL = 50
+    HIGH = 100
+
+
+_queues = {}
+
+
+def get_queue(name: str):
+    """Returns the Huey instance of the `HUEY_QUEUES` workload `name`.
+
+    The workload configured as `HUEY` is djhuey's own instance, so `run_huey` keeps consuming it.
+    Other workloads get their own Redis queue, consumed by `run_huey_queue <name>`.
+    """
+    if name not in _queues:
+        config = dict(settings.HUEY_QUEUES[name])
+
+        if config["name"] == djhuey.HUEY.name:
+            _queues[name] = djhuey.HUEY
+        else:
+            config.pop("consumer", None)
+            config.update(config.pop("connection", {}))
+            config.setdefault("immediate", settings.DEBUG)
+
+            huey_class = import_string(config.pop("huey_class"))
+            _queues[name] = huey_class(config.pop("name"), **config)
+
+    return _queues[name]
+
+
+def task(queue: str, priority: TaskPriority = TaskPriority.NORMAL, **kwargs):
+    """`djhuey.task` on the `queue` workload, with an explicit priority."""
+    return get_queue(queue).task(priority=priority, **kwargs)
+
+
+def db_task(queue: str, priority: TaskPriority = TaskPriority.NORMAL, **kwargs):
+    """`djhuey.db_task` on the `queue` workload, with an explicit priority."""
+
+    def decorator(fn):
+        ret = get_queue(queue).task(priority=priority, **kwargs)(djhuey.close_db(fn))
+        ret.call_local = fn
+        return ret
+
+    return decorator
+
+
+def db_periodic_task(
+    queue: str, validate_datetime, priority: TaskPriority = TaskPriority.NORMAL, **kwargs
+):
+    """`djhuey.db_periodic_task` on the `queue` workload, with an explicit priority."""
+
+    def decorator(fn):
+        ret = get_queue(queue).periodic_task(validate_datetime, priority=priority, **kwargs)(
+            djhuey.close_db(fn)
+        )
+        ret.call_local = fn
+        return ret
+
+    return decorator
+
+
+def periodic_task(
+    queue: str, validate_datetime, priority: TaskPriority = TaskPriority.NORMAL, **kwargs
+):
+    return get_queue(queue).periodic_task(validate_datetime, priority=priority, **kwargs)
+
+
+def lock_task(queue: str, lock_name: str):
+    return get_queue(queue).lock_task(lock_name)
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+
+
+class SessionStore(CacheSessionStore):
+    """Keeps sessions in the `SESSION_CACHE_ALIAS` Redis cache, serialized by its serializer.
+
+    Expiry slides: every load pushes the key's TTL back with a single `EXPIRE`, so sessions
+    that are only read are never rewritten. While `SESSION_DB_FALLBACK` is on, sessions that
+    are missing from Redis are read from `django_session` once and moved over, so live
+    sessions survive the switch from the database backend.
+    """
+
+    cache_key_prefix = "session:"
+
+    def load(self):
+        try:
+            session_data = self._cache.get(self.cache_key)
+        except Exception:
+            session_data = None
+
+        if session_data is not None:
+            self._cache.touch(self.cache_key, self.get_expiry_age(session_data=session_data))
+            return session_data
+
+        if settings.SESSION_DB_FALLBACK:
+            session_data = self.load_from_db()
+            if session_data:
+                return session_data
+
+        self._session_key = None
+        return {}
+
+    def load_from_db(self):
+        """Moves a session from `django_session` into Redis, returning its data."""
+        db_session = DBSessionStore(self.session_key)
+        session_data = db_session.load()
+
+        if session_data:
+            self._cache.set(
+                self.cache_key, session_data, self.get_expiry_age(session_data=session_data)
+            )
+            db_session.delete()
+
+        return session_data
+
+    def get_expiry_age(self, **kwargs):
+        # `_session_expiry` lives in the session data, which is not loaded yet inside `load`.
+        session_data = kwargs.pop("session_data", None)
+        if session_data is not None:
+            kwargs.setdefault("expiry", session_data.get("_session_expiry"))
+
+        return super().get_expiry_age(**kwargs)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        # `SET ... XX` replaces the read Django does to check that the session still exists.
+        saved = self._cache.set(
+            self.cache_key,
+            self._get_session(no_load=must_create),
+            self.get_expiry_age(),
+            nx=must_create,
+            xx=not must_create,
+        )
+
+        if not saved:
+            raise CreateError if must_create else UpdateError
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.clients import get_redis
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests against `TEST_REDIS_URL`, so that they never read or overwrite the data of
+    the development server, which shares its Redis.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        self.redis_settings = override_settings(
+            REDIS_URL=settings.TEST_REDIS_URL,
+            CACHES={
+                alias: {**config, "LOCATION": settings.TEST_REDIS_URL}
+                for alias, config in settings.CACHES.items()
+            },
+        )
+        self.redis_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.redis_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+def flush_test_redis() -> None:
+    """Empties the test Redis database, which holds the caches, sessions, quiz holds and attempts.
+
+    Meant for `setUp`, so that keys built from primary keys that the next test reuses never
+    leak between tests.
+    """
+    if settings.REDIS_URL != settings.TEST_REDIS_URL:
+        raise RuntimeError("Refusing to flush Redis outside of `manage.py test`.")
+    get_redis().flushdb()
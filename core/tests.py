@@ -1,3 +1,166 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from accounts.tasks import send_async_account_activation_mail, send_async_password_reset_mail
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from giveaways.enums import GiveawayStatus
+from giveaways.models import Giveaway, MonetaryPrize, Participant
+
+from .management.commands.requeue_moved_tasks import upgrade_args
+from .sessions import SessionStore
+from .testing import flush_test_redis
+from .utils import LatencyHistogram
+
+
+class IndexViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        creator = get_user_model().objects.create_user(
+            username="creator",
+            email="creator@giveaway.app",
+            password="password",
+            first_name="Giveaway",
+            last_name="Creator",
+        )
+
+        for index in range(6):
+            giveaway = Giveaway.objects.create(
+                title=f"Giveaway {index}",
+                number_of_participants=1000,
+                number_of_winners=10,
+                creator=creator,
+                status=GiveawayStatus.ACTIVE,
+                end_at=timezone.now() + timedelta(days=1),
+                participant_count=200,
+            )
+            MonetaryPrize.objects.create(giveaway=giveaway, amount=10000)
+            Participant.objects.bulk_create(
+                Participant(
+                    giveaway=giveaway,
+                    name="Participant",
+                    email="participant@giveaway.app",
+                    bank_code="044",
+                    account_number=f"{number:010d}",
+                    is_eligible=True,
+                )
+                for number in range(200)
+            )
+
+    def setUp(self):
+        flush_test_redis()
+
+    def test_page_renders_cards_in_a_single_query(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("core:index"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["giveaways"]), 4)
+        self.assertContains(response, "Participants: 200 of 1000")
+        self.assertEqual(len(context.captured_queries), 1)
+
+        # No participant rows are loaded, however many each giveaway has.
+        for query in context.captured_queries:
+            self.assertNotIn("giveaways_participant", query["sql"])
+
+    def test_next_page_does_not_count_the_feed(self):
+        response = self.client.get(reverse("core:index"))
+        next_cursor = response.context["page_obj"].next_cursor
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("core:index"), {"cursor": next_cursor})
+
+        self.assertEqual(len(response.context["giveaways"]), 2)
+        self.assertFalse(response.context["page_obj"].has_next())
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn("COUNT(", context.captured_queries[0]["sql"])
+
+
+class SessionStoreTestCase(TestCase):
+    def setUp(self):
+        flush_test_redis()
+
+    def test_database_sessions_are_moved_to_redis(self):
+        db_session = DBSessionStore()
+        db_session["account_number"] = "0123456789"
+        db_session.create()
+
+        session = SessionStore(db_session.session_key)
+
+        self.assertEqual(session["account_number"], "0123456789")
+        self.assertFalse(Session.objects.filter(session_key=db_session.session_key).exists())
+
+        # Later requests read the session from Redis alone.
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(SessionStore(session.session_key)["account_number"], "0123456789")
+        self.assertEqual(len(context.captured_queries), 0)
+
+        session.delete()
+
+    def test_saving_a_deleted_session_does_not_recreate_it(self):
+        session = SessionStore()
+        session.create()
+        stale = SessionStore(session.session_key)
+        stale["quiz_attempt"] = "attempt"
+        session.delete()
+
+        with self.assertRaises(UpdateError):
+            stale.save()
+
+        self.assertFalse(SessionStore().exists(session.session_key))
+
+
+class LatencyHistogramTestCase(SimpleTestCase):
+    def test_empty_histogram_has_no_quantiles(self):
+        self.assertIsNone(LatencyHistogram().quantile(0.5))
+
+    def test_slow_latencies_report_the_largest_bound(self):
+        histogram = LatencyHistogram()
+        histogram.observe(0.003)
+        histogram.observe(30.0)
+
+        self.assertEqual(histogram.quantile(0.5), 0.005)
+        self.assertEqual(histogram.quantile(0.99), LatencyHistogram.buckets[-1])
+        self.assertEqual(
+            json.loads(json.dumps(histogram.snapshot(), allow_nan=False))["p99"], 10.0
+        )
+
+
+class RequeueMovedTasksTestCase(TestCase):
+    def message(self, task, *args):
+        return task.huey._registry.create_message(task.s(*args))
+
+    def test_legacy_email_tasks_get_the_rendered_recipient(self):
+        user = get_user_model().objects.create_user(
+            username="user",
+            email="user@giveaway.app",
+            password="password",
+            first_name="Giveaway",
+            last_name="User",
+        )
+        recipient = {
+            "username": "user",
+            "email": "user@giveaway.app",
+            "first_name": "Giveaway",
+            "last_name": "User",
+        }
+
+        activation = self.message(send_async_account_activation_mail, user.pk, "url")
+        reset = self.message(send_async_password_reset_mail, user.email, "url")
+        current = self.message(send_async_password_reset_mail, recipient, "url")
+
+        self.assertEqual(upgrade_args(activation), (recipient, "url"))
+        self.assertEqual(upgrade_args(reset), (recipient, "url"))
+        self.assertIs(upgrade_args(current), current.args)
+
+    def test_legacy_email_tasks_to_deleted_users_are_dropped(self):
+        message = self.message(send_async_password_reset_mail, "gone@giveaway.app", "url")
+
+        self.assertIsNone(upgrade_args(message))
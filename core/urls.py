@@ -5,4 +5,5 @@ from . import views
 app_name = "core"
 urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
+    path("stats/clients/", views.ClientStatsView.as_view(), name="client-stats"),
 ]
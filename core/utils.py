@@ -0,0 +1,132 @@
+import bisect
+import threading
+import time
+from typing import Optional
+
+
+class CircuitBreaker:
+    """Stops calls to a flaky dependency once it keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and `allow_request` returns
+    False for `reset_timeout` seconds. The first request after that is let through; a success
+    closes the breaker again while a failure re-opens it. State is kept per process.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused, without claiming the half-open probe."""
+        with self.lock:
+            return (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at < self.reset_timeout
+            )
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # half-open: let this request probe the dependency.
+                self.opened_at = time.monotonic()
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """Paces calls to a rate limited API.
+
+    Holds up to `capacity` tokens refilled at `rate` tokens per second; `acquire` blocks until a
+    token is available. State is kept per process.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class LatencyHistogram:
+    """Counts observed latencies into fixed buckets, bounded in seconds.
+
+    Quantiles are read off the bucket bounds, which is precise enough to spot regressions while
+    keeping `observe` O(log buckets) and memory constant. Latencies past the largest bound are
+    reported as that bound, and quantiles are None until something is observed. State is kept
+    per process.
+    """
+
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        # The extra count is for latencies past the largest bound.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self.lock:
+            if not self.count:
+                return None
+
+            rank = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
@@ -1,20 +1,32 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from giveaways.cache import attach_cache_versions
 from giveaways.models import Giveaway
+from payments.services import paystack
 
+from .clients import get_pool_stats
+from .pagination import CursorPaginationMixin
 
-class IndexView(generic.ListView):
+
+class IndexView(CursorPaginationMixin, generic.ListView):
     template_name = "index.html"
-    queryset = (
-        Giveaway.objects.select_related("monetary_prize", "creator", "quiz_category")
-        .prefetch_related("participants")
-        .filter(is_public=True)
-        .order_by("-created_at")
-    )
+    queryset = Giveaway.objects.cards().filter(is_public=True)
     context_object_name = "giveaways"
     paginate_by = 4
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["title"] = "Giveaway"
+        attach_cache_versions(context["giveaways"])
 
         return context
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class ClientStatsView(generic.View):
+    """Reports the pool utilization and Paystack latencies of the process serving the request."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({"pools": get_pool_stats(), "paystack": paystack.get_latency_stats()})
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+"""`manage.py` with gevent's monkey-patching applied first, for greenlet Huey consumers.
+
+e.g. `./gevent_manage.py run_huey_queue notifications`. The standard library has to be patched
+before Django, redis-py and requests are imported, which `manage.py` cannot do for one command.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from manage import main  # noqa: E402
+
+if __name__ == "__main__":
+    main()
@@ -35,11 +35,13 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "huey.contrib.djhuey",
     "crispy_forms",
     "crispy_bootstrap5",
     "accounts",
+    "core",
     "giveaways",
     "payments",
 ]
@@ -53,7 +55,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
-    # "payments.middleware.PaystackMiddleware",
+    "payments.middleware.PaystackMiddleware",
 ]
 
 PASSWORD_HASHERS = [
@@ -91,6 +93,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "giveaways.context_processors.enums",
+                "giveaways.context_processors.cache_settings",
             ],
         },
     },
@@ -159,27 +162,202 @@ DEFAULT_FROM_EMAIL = "noreply@giveaway.app"
 
 REDIS_URL = "redis://localhost:6379/4"
 
-HUEY = {
-    "name": "giveaway",
-    "huey_class": "huey.PriorityRedisExpireHuey",
-    "immediate": False,
-    "utc": True,
-    "consumer": {
-        "workers": 2,
-        "worker_type": "thread",
-        "initial_delay": 0.1,
-        "backoff": 1.15,
-        "max_delay": 10.0,
-        "scheduler_interval": 1,
-        "periodic": True,
-        "check_worker_health": True,
+# Per process, see `core.clients`. Checkouts wait up to `REDIS_POOL_TIMEOUT` seconds when the
+# pool is exhausted before raising, which shows up as `waits` in the pool stats.
+REDIS_MAX_CONNECTIONS = 50
+
+REDIS_POOL_TIMEOUT = 5
+
+REDIS_HEALTH_CHECK_INTERVAL = 30
+
+# Keep-alive connections per host of the shared HTTP session, at least `PAYSTACK_POOL_MAXSIZE`.
+HTTP_POOL_MAXSIZE = 10
+
+HTTP_POOL_HOSTS = 4
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://localhost:6379/5",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    },
+    # Kept apart from "default" so that flushing fragment caches never logs anyone out.
+    "sessions": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://localhost:6379/6",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "django_redis.serializers.msgpack.MSGPackSerializer",
+        },
+    },
+}
+
+# `manage.py test` points `REDIS_URL` and every cache here instead, see `core.testing`.
+TEST_REDIS_URL = "redis://localhost:6379/15"
+
+TEST_RUNNER = "core.testing.TestRunner"
+
+SESSION_ENGINE = "core.sessions"
+
+SESSION_CACHE_ALIAS = "sessions"
+
+# Sessions missing from Redis are moved over from `django_session` on first use.
+# Turn off once `SESSION_COOKIE_AGE` has passed since the switch, then run `clearsessions`.
+SESSION_DB_FALLBACK = True
+
+GIVEAWAY_FRAGMENT_CACHE_TTL = 60 * 5
+
+GIVEAWAY_CACHE_VERSION_TTL = 60 * 60 * 24
+
+# One queue and consumer profile per workload, each consumed by `run_huey_queue <workload>`,
+# so that a backlog in one workload never delays another. Run `requeue_moved_tasks` once when
+# upgrading from the single `giveaway` queue, before starting the consumers.
+HUEY_QUEUES = {
+    # Webhooks, payouts and reconciliation. Few workers, as most of the work holds DB rows.
+    # Threads rather than greenlets: psycopg2 blocks the gevent hub while a row lock is waited
+    # on, so one locked transfer would stall every other payments greenlet.
+    "payments": {
+        "name": "giveaway.payments",
+        "huey_class": "huey.PriorityRedisExpireHuey",
+        "immediate": False,
+        "utc": True,
+        "consumer": {
+            "workers": 4,
+            "worker_type": "thread",
+            "initial_delay": 0.1,
+            "backoff": 1.15,
+            "max_delay": 1.0,
+            "scheduler_interval": 1,
+            "periodic": True,
+            "check_worker_health": True,
+        },
+    },
+    # Emails, which spend their time waiting on SMTP. Greenlet workers need gevent, and to be
+    # started with `./gevent_manage.py run_huey_queue notifications`.
+    "notifications": {
+        "name": "giveaway.notifications",
+        "huey_class": "huey.PriorityRedisExpireHuey",
+        "immediate": False,
+        "utc": True,
+        "consumer": {
+            "workers": 50,
+            "worker_type": "greenlet",
+            "initial_delay": 0.1,
+            "backoff": 1.15,
+            "max_delay": 10.0,
+            "scheduler_interval": 1,
+            "periodic": True,
+            "check_worker_health": True,
+        },
+    },
+    # Giveaway lifecycle, recipient provisioning and clean ups. Also consumed by `run_huey`.
+    "maintenance": {
+        "name": "giveaway",
+        "huey_class": "huey.PriorityRedisExpireHuey",
+        "immediate": False,
+        "utc": True,
+        "consumer": {
+            "workers": 2,
+            "worker_type": "thread",
+            "initial_delay": 0.1,
+            "backoff": 1.15,
+            "max_delay": 10.0,
+            "scheduler_interval": 1,
+            "periodic": True,
+            "check_worker_health": True,
+        },
     },
 }
 
+HUEY = HUEY_QUEUES["maintenance"]
+
 PAYSTACK_SECRET_KEY = env("PAYSTACK_TEST_SECRET")
 
 PAYSTACK_PUBLIC_KEY = env("PAYSTACK_TEST_PUBLIC")
 
-PAYSTACK_URL = "https://api.paystack.co"
+# Point at `manage.py fake_paystack` for load tests.
+PAYSTACK_URL = env("PAYSTACK_URL", default="https://api.paystack.co")
+
+PAYSTACK_TIMEOUT = 5
+
+# Per-endpoint overrides of `PAYSTACK_TIMEOUT`.
+PAYSTACK_TIMEOUTS = {
+    "/bank/resolve": 3,
+    "/transfer/bulk": 15,
+    "/transferrecipient/bulk": 15,
+}
+
+PAYSTACK_MAX_RETRIES = 2
+
+PAYSTACK_RETRY_BACKOFF = 0.25
+
+PAYSTACK_FAILURE_THRESHOLD = 5
+
+PAYSTACK_RESET_TIMEOUT = 30
+
+PAYSTACK_POOL_MAXSIZE = 10
+
+# Paystack rate limits are not published per endpoint, stay well below what they tolerate.
+PAYSTACK_RATE_LIMIT = 5
+
+PAYSTACK_RATE_LIMIT_BURST = 10
+
+PAYSTACK_RECIPIENT_BATCH_SIZE = 100
+
+# Participants whose transfer recipient Paystack rejects are retried after this many seconds,
+# doubled on every attempt, and given up on after `PAYSTACK_RECIPIENT_MAX_ATTEMPTS`.
+PAYSTACK_RECIPIENT_RETRY_BACKOFF = 60
+
+PAYSTACK_RECIPIENT_MAX_ATTEMPTS = 5
+
+# Maximum number of transfers Paystack accepts in a single `/transfer/bulk` call.
+PAYSTACK_BULK_TRANSFER_LIMIT = 100
+
+WEBHOOK_BATCH_SIZE = 500
+
+# Transactions left INITIATED/PENDING this long are verified against Paystack by the reconciler,
+# and top ups are marked as `FAILED` once they are older than `TRANSACTION_EXPIRE_AFTER`.
+TRANSACTION_RECONCILE_AFTER = 60 * 10
+
+TRANSACTION_EXPIRE_AFTER = 60 * 60 * 24
+
+TRANSACTION_RECONCILE_BATCH_SIZE = 200
+
+NUBAN_CACHE_TTL = 60 * 60 * 24 * 7
+
+NUBAN_NEGATIVE_CACHE_TTL = 60 * 10
+
+# Top up links are reused for this long, keep it within the lifetime of Paystack's access codes.
+PAYSTACK_TOPUP_LINK_TTL = 60 * 60 * 12
 
 PAYSTACK_CALLBACK_URL = "http://localhost:8000/payments/paystack/callback"
+
+QUIZ_POOL_SIZE = 200
+
+QUIZ_POOL_BATCH_SIZE = 50
+
+# Point at `manage.py fake_paystack` for load tests, it also stands in for opentdb.
+QUIZ_API_URL = env("QUIZ_API_URL", default="https://opentdb.com/api.php")
+
+QUIZ_API_TIMEOUT = 5
+
+# opentdb answers one request every 5 seconds per IP.
+QUIZ_API_REQUEST_INTERVAL = 5
+
+QUIZ_API_FAILURE_THRESHOLD = 3
+
+QUIZ_API_RESET_TIMEOUT = 60
+
+# Seconds a participant has to answer a quiz.
+QUIZ_TIME_LIMIT = 30
+
+# Unanswered quiz attempts expire from Redis after this long, the grace covers slow submissions.
+QUIZ_ATTEMPT_TTL = QUIZ_TIME_LIMIT + 30
+
+# Slots held for quiz participants are handed back after this long if the quiz is not passed.
+QUIZ_RESERVATION_TTL = 60 * 5
+
+# Account numbers that failed a quiz cannot hold a slot on that giveaway again for this long.
+QUIZ_RETRY_COOLDOWN = 60 * 60 * 24
@@ -29,10 +29,13 @@ if settings.DEBUG:
 
 
 urlpatterns = [
-    path("__debug__/", include(debug_urls)),
     path("admin/", admin.site.urls),
     path("", include("accounts.urls")),
     path("", include("core.urls")),
     path("", include("giveaways.urls")),
     path("", include("payments.urls")),
 ]
+
+# Without DEBUG, e.g. under `manage.py test`, there is no toolbar to route to.
+if debug_urls is not None:
+    urlpatterns.insert(0, path("__debug__/", include(debug_urls)))
@@ -0,0 +1,45 @@
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_giveaway_version_key(giveaway_id: int) -> str:
+    return f"giveaway:{giveaway_id}:version"
+
+
+def get_giveaway_versions(giveaway_ids: Iterable[int]) -> Dict[int, int]:
+    """Returns the cache version of each giveaway in a single round trip."""
+    keys = {get_giveaway_version_key(giveaway_id): giveaway_id for giveaway_id in giveaway_ids}
+    versions = cache.get_many(keys.keys())
+
+    return {giveaway_id: versions.get(key, 0) for key, giveaway_id in keys.items()}
+
+
+def attach_cache_versions(giveaways) -> None:
+    """Sets `cache_version` on each giveaway for use in `{% cache %}` fragment keys."""
+    versions = get_giveaway_versions(giveaway.pk for giveaway in giveaways)
+
+    for giveaway in giveaways:
+        giveaway.cache_version = versions[giveaway.pk]
+
+
+def bump_giveaway_versions(giveaway_ids: Iterable[int]) -> None:
+    for giveaway_id in set(giveaway_ids):
+        key = get_giveaway_version_key(giveaway_id)
+        try:
+            cache.incr(key)
+            cache.touch(key, settings.GIVEAWAY_CACHE_VERSION_TTL)
+        except ValueError:
+            # Versions outlive every fragment keyed on them, so restarting from 1 is safe.
+            cache.set(key, 1, settings.GIVEAWAY_CACHE_VERSION_TTL)
+
+
+def invalidate_giveaway_cache(*giveaway_ids: int) -> None:
+    """Invalidates every cached fragment of the given giveaways once the transaction commits.
+
+    Bumping before the commit would let a concurrent request re-cache the old rows.
+    """
+    if giveaway_ids:
+        transaction.on_commit(lambda: bump_giveaway_versions(giveaway_ids))
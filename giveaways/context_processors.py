@@ -1,5 +1,11 @@
+from django.conf import settings
+
 from .enums import GiveawayCategory, GiveawayStatus
 
 
 def enums(request):
     return {"GiveawayStatus": GiveawayStatus, "GiveawayCategory": GiveawayCategory}
+
+
+def cache_settings(request):
+    return {"GIVEAWAY_FRAGMENT_CACHE_TTL": settings.GIVEAWAY_FRAGMENT_CACHE_TTL}
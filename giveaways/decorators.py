@@ -1,59 +1,65 @@
 import functools
 
 from django.contrib import messages
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import timezone
 
 from giveaways.enums import GiveawayStatus
 
-from .models import Giveaway
+from .utils import get_giveaway_for_request
 
 
-def participant_is_not_creator(f):
-    @functools.wraps(f)
-    def decorator(request, *args, **kwargs):
-        slug = kwargs.get("slug")
-        giveaway = get_object_or_404(Giveaway.objects.select_related("creator"), slug=slug)
+def is_not_creator(request, giveaway) -> bool:
+    return giveaway.creator_id != request.user.pk
 
-        if giveaway.creator != request.user:
-            return f(request, *args, **kwargs)
 
-        messages.error(request, "You cannot join a giveaway you created!")
-        return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": slug}))
+def is_active(request, giveaway) -> bool:
+    return giveaway.status == GiveawayStatus.ACTIVE and giveaway.end_at > timezone.now()
 
-    return decorator
 
+def has_available_slots(request, giveaway) -> bool:
+    return giveaway.participant_count < giveaway.number_of_participants
 
-def giveaway_is_active(f):
-    @functools.wraps(f)
-    def decorator(request, *args, **kwargs):
-        slug = kwargs.get("slug")
-        giveaway = get_object_or_404(Giveaway, slug=slug)
-        now = timezone.now()
 
-        if giveaway.status == GiveawayStatus.ACTIVE and giveaway.end_at > now:
-            return f(request, *args, **kwargs)
+JOIN_RULES = [
+    (is_not_creator, "You cannot join a giveaway you created!"),
+    (is_active, "You can only join giveaways that are active"),
+    (
+        has_available_slots,
+        "The maximum number of participants for this giveaway has been reached. Better luck next time!",
+    ),
+]
+
 
-        messages.error(request, "You can only join giveaways that are active")
-        return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": slug}))
+def giveaway_rules(rules):
+    """Builds a view decorator that checks `rules` against the request's giveaway, in order.
 
-    return decorator
+    The giveaway is resolved through `get_giveaway_for_request`, so stacking several of these
+    decorators still costs a single lookup.
+    """
 
+    def wrapper(f):
+        @functools.wraps(f)
+        def decorator(request, *args, **kwargs):
+            slug = kwargs.get("slug")
+            giveaway = get_giveaway_for_request(request, slug)
 
-def giveaway_participants_limit(f):
-    @functools.wraps(f)
-    def decorator(request, *args, **kwargs):
-        slug = kwargs.get("slug")
-        giveaway = get_object_or_404(Giveaway.objects.prefetch_related("participants"), slug=slug)
+            for check, message in rules:
+                if not check(request, giveaway):
+                    messages.error(request, message)
+                    return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": slug}))
 
-        if giveaway.participants.count() < giveaway.number_of_participants:
             return f(request, *args, **kwargs)
 
-        messages.error(
-            request,
-            "The maximum number of participants for this giveaway has been reached. Better luck next time!",
-        )
-        return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": slug}))
+        return decorator
+
+    return wrapper
+
+
+participant_is_not_creator = giveaway_rules(JOIN_RULES[:1])
+giveaway_is_active = giveaway_rules(JOIN_RULES[1:2])
+giveaway_participants_limit = giveaway_rules(JOIN_RULES[2:])
 
-    return decorator
+# Evaluates every admission rule against one giveaway lookup.
+giveaway_is_joinable = giveaway_rules(JOIN_RULES)
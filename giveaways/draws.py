@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List
+
+from django.db import connection
+
+from .models import Participant
+
+
+def get_participants_digest(giveaway_id: int) -> str:
+    """Returns the SHA-256 of the giveaway's eligible participant ids, hashed inside PostgreSQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT encode(
+                sha256(convert_to(coalesce(string_agg(id::text, ',' ORDER BY id), ''), 'UTF8')),
+                'hex'
+            )
+            FROM giveaways_participant
+            WHERE giveaway_id = %s AND is_eligible
+            """,
+            [giveaway_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def iter_eligible_participant_ids(giveaway_id: int) -> Iterator[int]:
+    """Streams the ids the draw runs over, in the order the participants digest hashes them."""
+    return (
+        Participant.objects.filter(giveaway_id=giveaway_id, is_eligible=True)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=5000)
+    )
+
+
+def derive_draw_seed(slug: str, end_at: datetime, participants_digest: str) -> str:
+    """Derives the seed of a draw from inputs anyone can verify after the giveaway ends."""
+    end_at = end_at.astimezone(timezone.utc).isoformat()
+    return hashlib.sha256(f"{slug}|{end_at}|{participants_digest}".encode()).hexdigest()
+
+
+def draw_index(seed: str, position: int) -> int:
+    """Returns a number in `[0, position]` for the `position`th candidate of the draw.
+
+    Derived from SHA-256 rather than `random`, so replays do not depend on the Python version.
+    """
+    digest = hashlib.sha256(f"{seed}:{position}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % (position + 1)
+
+
+def sample_winner_ids(seed: str, participant_ids: Iterable[int], k: int) -> List[int]:
+    """Reservoir samples `k` ids from a stream ordered by id, holding only `k` ids in memory."""
+    reservoir = []
+
+    for position, participant_id in enumerate(participant_ids):
+        if position < k:
+            reservoir.append(participant_id)
+            continue
+
+        index = draw_index(seed, position)
+        if index < k:
+            reservoir[index] = participant_id
+
+    return reservoir
@@ -7,6 +7,15 @@ class GiveawayStatus(TextChoices):
     ENDED = "ENDED"
 
 
+class AdmissionStatus(TextChoices):
+    ADMITTED = "ADMITTED"
+    RESERVED = "RESERVED"
+    EXPIRED = "EXPIRED"
+    FULL = "FULL"
+    DUPLICATE = "DUPLICATE"
+    FAILED = "FAILED"
+
+
 class QuizChoices(IntegerChoices):
     RANDOM = 0
     SPORTS = 21
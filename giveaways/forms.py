@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django import forms
+from django.conf import settings
 from django.contrib.auth.hashers import check_password
 
 from giveaways.utils import verify_nuban_and_bank
@@ -134,6 +135,10 @@ class JoinGiveawayForm(forms.Form):
         cleaned_data = super().clean()
         nuban, bank_code = cleaned_data.get("account_number"), cleaned_data.get("bank")
 
+        # Skip the lookup when either field failed its own validation.
+        if not nuban or not bank_code:
+            return cleaned_data
+
         status, account_name = verify_nuban_and_bank(nuban, bank_code)
 
         if not status:
@@ -156,7 +161,7 @@ class JoinGiveawayQuizForm(forms.Form):
             label="quiz_id", widget=forms.HiddenInput, initial=questions["id"]
         )
         self.fields["timer"] = forms.CharField(
-            label="quiz_id", widget=forms.HiddenInput, initial=30
+            label="timer", widget=forms.HiddenInput, initial=settings.QUIZ_TIME_LIMIT
         )
 
         for index, question in enumerate(questions["questions"], start=1):
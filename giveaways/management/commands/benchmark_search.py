@@ -0,0 +1,153 @@
+import random
+import re
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from giveaways.enums import GiveawayStatus
+from giveaways.models import Giveaway
+from giveaways.utils import generate_hex
+
+WORDS = [
+    "airtime",
+    "anniversary",
+    "birthday",
+    "bonus",
+    "cash",
+    "celebration",
+    "christmas",
+    "data",
+    "december",
+    "easter",
+    "football",
+    "friday",
+    "fuel",
+    "gadget",
+    "gift",
+    "holiday",
+    "lagos",
+    "lucky",
+    "music",
+    "naira",
+    "phone",
+    "quiz",
+    "salary",
+    "season",
+    "student",
+    "sunday",
+    "thanksgiving",
+    "transport",
+    "valentine",
+    "weekend",
+    "winner",
+    "year",
+]
+
+NAMES = [
+    "Adaeze",
+    "Adewumi",
+    "Bola",
+    "Chidi",
+    "Chioma",
+    "Emeka",
+    "Funke",
+    "Ibrahim",
+    "Isaac",
+    "Kemi",
+    "Ngozi",
+    "Olu",
+    "Segun",
+    "Tayo",
+    "Tunde",
+    "Uche",
+    "Yemi",
+    "Zainab",
+]
+
+# (label, query) pairs covering exact, multi-word, misspelt and creator-name searches.
+QUERIES = [
+    ("single word", "birthday"),
+    ("multiple words", "christmas cash giveaway"),
+    ("misspelt word", "valentne"),
+    ("creator name", "Adewumi"),
+    ("no match", "zzzzqqqq"),
+]
+
+
+class Command(BaseCommand):
+    help = "Seeds giveaways and reports `EXPLAIN ANALYZE` timings for representative searches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--giveaways", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--show-plans", action="store_true")
+
+    def handle(self, *args, **options):
+        if not options["skip_seed"]:
+            self.seed(options["giveaways"], options["batch_size"])
+
+        for label, query in QUERIES:
+            queryset = Giveaway.objects.search(query).filter(is_public=True)[:20]
+
+            plan = queryset.explain(analyze=True, buffers=True)
+            execution_time = re.search(r"Execution Time: ([\d.]+) ms", plan).group(1)
+
+            started_at = time.perf_counter()
+            results = len(list(queryset))
+            elapsed = (time.perf_counter() - started_at) * 1000
+
+            self.stdout.write(
+                f"{label:<16} q={query!r:<28} rows={results:<3} "
+                f"execution={execution_time} ms round_trip={elapsed:.2f} ms"
+            )
+            if options["show_plans"]:
+                self.stdout.write(plan + "\n")
+
+    def seed(self, total, batch_size):
+        User = get_user_model()
+
+        creators = []
+        for first_name in NAMES:
+            creator, _ = User.objects.get_or_create(
+                email=f"{first_name.lower()}@benchmark.giveaway.app",
+                defaults={
+                    "username": f"bench_{first_name.lower()}",
+                    "first_name": first_name,
+                    "last_name": random.choice(NAMES),
+                },
+            )
+            creators.append(creator)
+
+        now = timezone.now()
+        seeded = Giveaway.objects.count()
+
+        while seeded < total:
+            batch = []
+            for _ in range(min(batch_size, total - seeded)):
+                title = " ".join(random.sample(WORDS, k=3)).title()
+                batch.append(
+                    Giveaway(
+                        title=title,
+                        description=" ".join(random.choices(WORDS, k=12)),
+                        slug=f"{title.lower().replace(' ', '-')}-{generate_hex()}{seeded}",
+                        number_of_participants=random.randint(5, 1000),
+                        number_of_winners=random.randint(1, 4),
+                        creator=random.choice(creators),
+                        is_public=random.random() < 0.9,
+                        status=random.choice(GiveawayStatus.values),
+                        end_at=now + timedelta(minutes=random.randint(-10080, 10080)),
+                    )
+                )
+                seeded += 1
+
+            Giveaway.objects.bulk_create(batch)
+            self.stdout.write(f"Seeded {seeded} of {total} giveaways...")
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE giveaways_giveaway")
+            cursor.execute("ANALYZE accounts_user")
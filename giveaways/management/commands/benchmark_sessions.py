@@ -0,0 +1,75 @@
+import statistics
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = ("django.contrib.sessions.backends.db", "core.sessions")
+
+
+def private_entry(session):
+    session["lucky-friday-cash-1a2b3c"] = True
+
+
+def join(session):
+    session["account_number"] = "0123456789"
+
+
+def start_quiz(session):
+    session["quiz_attempt"] = "6f1c1f9e-8f4e-4c8e-9a57-0a0f3c1d2b4e"
+
+
+def submit_quiz(session):
+    for key in ("lucky-friday-cash-1a2b3c", "account_number", "quiz_attempt"):
+        session.pop(key, None)
+
+
+def browse(session):
+    session.get("_auth_user_id")
+
+
+# The session writes of a private quiz giveaway join, then a read-only page view.
+FLOW = (private_entry, join, start_quiz, submit_quiz, browse)
+
+
+class Command(BaseCommand):
+    help = "Compares per-request session overhead of the database and Redis session engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--engines", nargs="+", default=ENGINES)
+        parser.add_argument("--flows", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for engine in options["engines"]:
+            SessionStore = import_module(engine).SessionStore
+            timings, queries = [], 0
+
+            for _ in range(options["flows"]):
+                session = SessionStore()
+                session.update({"_auth_user_id": "1", "_auth_user_backend": "backend"})
+                session.create()
+
+                with CaptureQueriesContext(connection) as context:
+                    for step in FLOW:
+                        started_at = time.perf_counter()
+
+                        # One request: load the session, touch it, save it if modified.
+                        session = SessionStore(session.session_key)
+                        step(session)
+                        if session.modified:
+                            session.save()
+
+                        timings.append((time.perf_counter() - started_at) * 1000)
+
+                queries += len(context.captured_queries)
+                session.delete()
+
+            requests = options["flows"] * len(FLOW)
+            self.stdout.write(
+                f"{engine:<38} requests={requests} "
+                f"mean={statistics.mean(timings):.3f} ms "
+                f"p95={sorted(timings)[int(0.95 * len(timings))]:.3f} ms "
+                f"db_queries/request={queries / requests:.2f}"
+            )
@@ -0,0 +1,152 @@
+import asyncio
+import random
+import re
+import statistics
+import time
+from itertools import count
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from giveaways.enums import Banks, GiveawayStatus
+from giveaways.models import Giveaway
+
+from .benchmark_search import QUERIES
+
+SCENARIOS = ("index", "search", "display", "join")
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the feed, search, giveaway and join hot paths over HTTP and reports latency "
+        "percentiles and queries per request. Run the app against `fake_paystack` first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--query-samples", type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.slugs = list(
+            Giveaway.objects.filter(
+                status=GiveawayStatus.ACTIVE, is_public=True, is_category_quiz=False
+            ).values_list("slug", flat=True)[:1000]
+        )
+        if not self.slugs:
+            raise CommandError("No active public giveaways found, run `seed_giveaways` first.")
+
+        # Account numbers are unique per giveaway, so every join uses a fresh one.
+        self.account_numbers = count(random.randint(10**8, 10**9))
+
+        self.stdout.write(
+            f"{'scenario':<10} {'requests':>8} {'errors':>6} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for scenario in options["scenarios"]:
+            queries = self.count_queries(scenario, options["query_samples"])
+            latencies, errors, elapsed = asyncio.run(
+                self.run_scenario(
+                    options["url"], scenario, options["requests"], options["concurrency"]
+                )
+            )
+
+            self.stdout.write(
+                f"{scenario:<10} {len(latencies):>8} {errors:>6} "
+                f"{len(latencies) / elapsed:>8.1f} "
+                f"{percentile(latencies, 0.50):>8.1f} "
+                f"{percentile(latencies, 0.95):>8.1f} "
+                f"{percentile(latencies, 0.99):>8.1f} "
+                f"{queries:>8.1f}"
+            )
+
+    def get_request(self, scenario):
+        """Returns `(path, form_data)` for one request of `scenario`."""
+        slug = random.choice(self.slugs)
+
+        if scenario == "index":
+            return reverse("core:index"), None
+        if scenario == "search":
+            return f"{reverse('giveaways:search-giveaway')}?q={random.choice(QUERIES)[1]}", None
+        if scenario == "display":
+            return reverse("giveaways:view-giveaway", kwargs={"slug": slug}), None
+
+        return reverse("giveaways:join-giveaway", kwargs={"slug": slug}), {
+            "join_giveaway_pre-email": "loadtest@giveaway.app",
+            "join_giveaway_pre-account_number": f"{next(self.account_numbers):010d}",
+            "join_giveaway_pre-bank": random.choice(Banks.values),
+        }
+
+    def count_queries(self, scenario, samples):
+        """Replays a few requests in-process to measure queries per request."""
+        # A non-internal address keeps the debug toolbar out of the measurements.
+        client = Client(REMOTE_ADDR="10.0.0.1")
+        counts = []
+
+        for _ in range(samples):
+            path, data = self.get_request(scenario)
+            with CaptureQueriesContext(connection) as context:
+                if data is None:
+                    client.get(path)
+                else:
+                    client.post(path, data)
+            counts.append(len(context.captured_queries))
+
+        return statistics.mean(counts)
+
+    async def run_scenario(self, url, scenario, requests, concurrency):
+        latencies = []
+        errors = 0
+        remaining = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            # Each worker keeps its own cookies, i.e. its own session and CSRF token.
+            async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+                for _ in remaining:
+                    path, data = self.get_request(scenario)
+
+                    started_at = time.perf_counter()
+                    try:
+                        if data is None:
+                            response = await client.get(path)
+                        else:
+                            response = await self.join(client, path, data)
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+
+                    latencies.append((time.perf_counter() - started_at) * 1000)
+                    if response.status_code >= 400:
+                        errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        return latencies, errors, time.perf_counter() - started_at
+
+    async def join(self, client, path, data):
+        """Runs the join flow: the form page for a CSRF token, then the form submission."""
+        page = await client.get(path)
+        token = CSRF_TOKEN.search(page.text)
+        if token is None:
+            return page
+
+        return await client.post(
+            path,
+            data={**data, "csrfmiddlewaretoken": token.group(1)},
+            headers={"referer": f"{client.base_url}{path}"},
+        )
@@ -0,0 +1,38 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.core.management.base import BaseCommand
+from django.db.models import F, Func, Max, Min
+
+from giveaways.models import Giveaway
+
+
+class Command(BaseCommand):
+    help = "Recomputes `search_vector_column` for every giveaway in batches of primary keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        bounds = Giveaway.objects.aggregate(first=Min("pk"), last=Max("pk"))
+
+        if bounds["first"] is None:
+            self.stdout.write("No giveaways to rebuild.")
+            return
+
+        # Same SQL function the triggers use, so rebuilt vectors match incremental ones.
+        search_vector = Func(
+            F("title"),
+            F("description"),
+            F("creator_id"),
+            function="giveaways_giveaway_search_vector",
+            output_field=SearchVectorField(),
+        )
+
+        rebuilt = 0
+        for start in range(bounds["first"], bounds["last"] + 1, batch_size):
+            rebuilt += Giveaway.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                search_vector_column=search_vector
+            )
+            self.stdout.write(f"Rebuilt {rebuilt} search vectors...")
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt {rebuilt} search vectors."))
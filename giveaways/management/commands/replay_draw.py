@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from giveaways.draws import (
+    derive_draw_seed,
+    get_participants_digest,
+    iter_eligible_participant_ids,
+    sample_winner_ids,
+)
+from giveaways.models import Giveaway
+
+
+class Command(BaseCommand):
+    help = "Replays the winner draw of a giveaway from its public inputs and checks the winners."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug")
+
+    def handle(self, *args, **options):
+        try:
+            giveaway = Giveaway.objects.get(slug=options["slug"])
+        except Giveaway.DoesNotExist:
+            raise CommandError(f"No giveaway found for slug -> {options['slug']}")
+
+        if not giveaway.draw_seed:
+            raise CommandError("This giveaway has no recorded draw.")
+
+        participants_digest = get_participants_digest(giveaway.pk)
+        if participants_digest != giveaway.participants_digest:
+            raise CommandError(
+                f"Eligible participants changed since the draw: "
+                f"{participants_digest} != {giveaway.participants_digest}"
+            )
+
+        draw_seed = derive_draw_seed(giveaway.slug, giveaway.end_at, participants_digest)
+        if draw_seed != giveaway.draw_seed:
+            raise CommandError(f"Seed mismatch: {draw_seed} != {giveaway.draw_seed}")
+
+        winner_ids = sample_winner_ids(
+            draw_seed, iter_eligible_participant_ids(giveaway.pk), giveaway.number_of_winners
+        )
+        recorded_ids = giveaway.participants.filter(is_winner=True).values_list("pk", flat=True)
+
+        self.stdout.write(f"Seed: {draw_seed}")
+        self.stdout.write(f"Participants digest: {participants_digest}")
+        self.stdout.write(f"Replayed winners: {sorted(winner_ids)}")
+
+        if set(winner_ids) != set(recorded_ids):
+            raise CommandError(f"Recorded winners differ: {sorted(recorded_ids)}")
+
+        self.stdout.write(self.style.SUCCESS("Replayed draw matches the recorded winners."))
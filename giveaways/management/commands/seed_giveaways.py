@@ -0,0 +1,118 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from giveaways.enums import Banks, GiveawayStatus
+from giveaways.models import Giveaway, MonetaryPrize, Participant
+from giveaways.utils import generate_hex
+
+from .benchmark_search import NAMES, WORDS
+
+# Number of (users, giveaways, participants) seeded at each scale.
+SCALES = {
+    "10k": (100, 1_000, 10_000),
+    "100k": (1_000, 10_000, 100_000),
+    "1m": (10_000, 100_000, 1_000_000),
+}
+
+
+class Command(BaseCommand):
+    help = "Seeds users, active giveaways and participants for load tests and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES.keys(), default="10k")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        users, giveaways, participants = SCALES[options["scale"]]
+        batch_size = options["batch_size"]
+
+        creators = self.seed_users(users, batch_size)
+        self.seed_giveaways(creators, giveaways, participants, batch_size)
+
+        with connection.cursor() as cursor:
+            for table in ("accounts_user", "giveaways_giveaway", "giveaways_participant"):
+                cursor.execute(f"ANALYZE {table}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {users} users, {giveaways} giveaways and {participants} participants."
+            )
+        )
+
+    def seed_users(self, total, batch_size):
+        User = get_user_model()
+        run = generate_hex()
+
+        users = [
+            User(
+                username=f"load_{run}_{index}",
+                email=f"load_{run}_{index}@loadtest.giveaway.app",
+                first_name=random.choice(NAMES),
+                last_name=random.choice(NAMES),
+                password="!",
+            )
+            for index in range(total)
+        ]
+        return User.objects.bulk_create(users, batch_size=batch_size)
+
+    def seed_giveaways(self, creators, total, participants, batch_size):
+        now = timezone.now()
+        banks = Banks.values
+        per_giveaway = participants // total
+        seeded = 0
+
+        while seeded < total:
+            batch = []
+            for _ in range(min(batch_size // per_giveaway or 1, total - seeded)):
+                title = " ".join(random.sample(WORDS, k=3)).title()
+                batch.append(
+                    Giveaway(
+                        title=title,
+                        description=" ".join(random.choices(WORDS, k=12)),
+                        slug=f"{title.lower().replace(' ', '-')}-{generate_hex()}",
+                        # Room is left so that load tests can keep joining every giveaway.
+                        number_of_participants=per_giveaway * 10,
+                        number_of_winners=random.randint(1, 4),
+                        creator=random.choice(creators),
+                        is_prize_monetary=True,
+                        status=GiveawayStatus.ACTIVE,
+                        end_at=now + timedelta(days=random.randint(1, 30)),
+                        participant_count=per_giveaway,
+                        eligible_count=per_giveaway,
+                    )
+                )
+
+            with transaction.atomic():
+                batch = Giveaway.objects.bulk_create(batch)
+                MonetaryPrize.objects.bulk_create(
+                    MonetaryPrize(
+                        giveaway=giveaway,
+                        amount=Decimal(10_000),
+                        net_amount=Decimal(9_600),
+                    )
+                    for giveaway in batch
+                )
+                Participant.objects.bulk_create(
+                    (
+                        Participant(
+                            giveaway=giveaway,
+                            name=f"{random.choice(NAMES)} {random.choice(NAMES)}",
+                            email=f"participant{number}@loadtest.giveaway.app",
+                            bank_code=random.choice(banks),
+                            account_number=f"{number:010d}",
+                            is_eligible=True,
+                        )
+                        for giveaway in batch
+                        for number in range(per_giveaway)
+                    ),
+                    batch_size=batch_size,
+                )
+
+            seeded += len(batch)
+            self.stdout.write(f"Seeded {seeded} of {total} giveaways...")
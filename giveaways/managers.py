@@ -1,40 +1,75 @@
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
 from django.db import models
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Coalesce
 
 
-class GiveawayManager(models.Manager):
-    def search(self, query):
-        search_vectors = (
-            SearchVector("title", weight="A")
-            + SearchVector("creator__first_name", weight="B")
-            + SearchVector("creator__last_name", weight="B")
-            + SearchVector("description", weight="C")
+class GiveawayQuerySet(models.QuerySet):
+    def cards(self):
+        """Projection holding only what a giveaway card renders.
+
+        Participant totals come from the denormalized `participant_count`, so rendering a page
+        of cards never touches the participants table.
+        """
+        return self.select_related("monetary_prize", "creator").only(
+            "title",
+            "description",
+            "slug",
+            "number_of_participants",
+            "number_of_winners",
+            "participant_count",
+            "is_creator_anonymous",
+            "is_public",
+            "is_category_quiz",
+            "status",
+            "created_at",
+            "end_at",
+            "creator__username",
+            "monetary_prize__amount",
+            "monetary_prize__net_amount",
         )
 
+    def search(self, query):
+        """Full-text search over the stored vectors, unioned with fuzzy trigram matches.
+
+        Each branch is its own index-backed `SELECT id`, combined with `UNION` inside an
+        `id IN (...)`: `search_vector_column` has a GIN index, and the `%` lookups
+        (`trigram_similar`) use the `gin_trgm_ops` indexes on the giveaway title and the
+        creator's names, matching above `pg_trgm.similarity_threshold` (0.3 by default).
+        A single `OR` across the branches would leave PostgreSQL scanning every giveaway.
+        """
         search_query = SearchQuery(query)
-        search_rank = SearchRank(search_vectors, search_query)
 
-        similarity = (
-            TrigramSimilarity("creator__first_name", query)
-            + TrigramSimilarity("creator__last_name", query)
-            + TrigramSimilarity("title", query)
-            + TrigramSimilarity("description", query)
+        similar_creators = get_user_model().objects.filter(
+            Q(first_name__trigram_similar=query) | Q(last_name__trigram_similar=query)
+        )
+        giveaways = self.model._default_manager
+
+        matches = (
+            giveaways.filter(search_vector_column=search_query)
+            .values("pk")
+            .union(
+                giveaways.filter(title__trigram_similar=query).values("pk"),
+                giveaways.filter(creator__in=similar_creators.values("pk")).values("pk"),
+            )
         )
 
         queryset = (
-            self.get_queryset()
-            .filter(search_vector_column=search_query)
-            .annotate(rank=search_rank + similarity)
+            self.filter(pk__in=matches)
+            .annotate(
+                # `real` to `double precision`, so a rank read back from a pagination cursor
+                # compares equal to the one computed in the database. Giveaways matched by
+                # trigram alone may have no vector yet, and a NULL rank can't be paginated.
+                rank=Cast(
+                    Coalesce(SearchRank(F("search_vector_column"), search_query), 0.0)
+                    + TrigramSimilarity("title", query),
+                    FloatField(),
+                )
+            )
             .order_by("-rank")
         )
         return queryset
 
-    def with_vectors(self):
-        vectors = (
-            SearchVector("title", weight="A")
-            + SearchVector("creator__first_name", weight="B")
-            + SearchVector("creator__last_name", weight="B")
-            + SearchVector("description", weight="C")
-        )
 
-        return self.get_queryset().annotate(vectors=vectors)
+GiveawayManager = models.Manager.from_queryset(GiveawayQuerySet)
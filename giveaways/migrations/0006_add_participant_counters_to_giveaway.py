@@ -0,0 +1,49 @@
+# Generated by Django 3.2.7 on 2021-10-20 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_participant_counters(apps, schema_editor):
+    Giveaway = apps.get_model("giveaways", "Giveaway")
+    Participant = apps.get_model("giveaways", "Participant")
+
+    counts = (
+        Participant.objects.filter(giveaway=OuterRef("pk"))
+        .values("giveaway")
+        .annotate(
+            total=Count("pk"),
+            eligible=Count("pk", filter=Q(is_eligible=True)),
+        )
+    )
+
+    Giveaway.objects.update(
+        participant_count=Coalesce(
+            Subquery(counts.values("total"), output_field=IntegerField()), 0
+        ),
+        eligible_count=Coalesce(
+            Subquery(counts.values("eligible"), output_field=IntegerField()), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0005_add_recipient_code_column"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="giveaway",
+            name="participant_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="participant count"),
+        ),
+        migrations.AddField(
+            model_name="giveaway",
+            name="eligible_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="eligible count"),
+        ),
+        migrations.RunPython(populate_participant_counters, migrations.RunPython.noop),
+    ]
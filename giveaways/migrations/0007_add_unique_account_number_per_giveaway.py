@@ -0,0 +1,65 @@
+# Generated by Django 3.2.7 on 2021-10-21 11:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_participants(apps, schema_editor):
+    """Keeps one participant per account number and giveaway, then recounts the giveaways.
+
+    Winners are kept over eligible participants, and those over the earliest entry.
+    """
+    Giveaway = apps.get_model("giveaways", "Giveaway")
+    Participant = apps.get_model("giveaways", "Participant")
+
+    duplicates = (
+        Participant.objects.values("giveaway", "account_number")
+        .annotate(entries=Count("pk"))
+        .filter(entries__gt=1)
+    )
+
+    for duplicate in duplicates.iterator():
+        participant_ids = list(
+            Participant.objects.filter(
+                giveaway=duplicate["giveaway"], account_number=duplicate["account_number"]
+            )
+            .order_by("-is_winner", "-is_eligible", "pk")
+            .values_list("pk", flat=True)
+        )
+        Participant.objects.filter(pk__in=participant_ids[1:]).delete()
+
+    counts = (
+        Participant.objects.filter(giveaway=OuterRef("pk"))
+        .values("giveaway")
+        .annotate(
+            total=Count("pk"),
+            eligible=Count("pk", filter=Q(is_eligible=True)),
+        )
+    )
+
+    Giveaway.objects.update(
+        participant_count=Coalesce(
+            Subquery(counts.values("total"), output_field=IntegerField()), 0
+        ),
+        eligible_count=Coalesce(
+            Subquery(counts.values("eligible"), output_field=IntegerField()), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0006_add_participant_counters_to_giveaway"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_participants, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="participant",
+            constraint=models.UniqueConstraint(
+                fields=("giveaway", "account_number"), name="unique_account_number_per_giveaway"
+            ),
+        ),
+    ]
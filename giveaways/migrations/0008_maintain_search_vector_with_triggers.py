@@ -0,0 +1,93 @@
+# Generated by Django 3.2.7 on 2021-10-22 14:05
+
+from django.conf import settings
+from django.db import migrations
+
+# Mirrors the weights `GiveawayManager.search` used to compute on the fly:
+# title (A), creator's first and last name (B), description (C).
+CREATE_SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION giveaways_giveaway_search_vector(text, text, bigint)
+RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector(COALESCE($1, '')), 'A')
+        || setweight(to_tsvector(COALESCE(creator.first_name, '')), 'B')
+        || setweight(to_tsvector(COALESCE(creator.last_name, '')), 'B')
+        || setweight(to_tsvector(COALESCE($2, '')), 'C')
+    FROM accounts_user AS creator
+    WHERE creator.id = $3;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION giveaways_giveaway_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector_column := giveaways_giveaway_search_vector(
+        NEW.title, NEW.description, NEW.creator_id
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION accounts_user_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE giveaways_giveaway
+    SET search_vector_column = giveaways_giveaway_search_vector(title, description, creator_id)
+    WHERE creator_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Django's `save()` lists every column in its UPDATE, so the `WHEN` clauses compare values
+# rather than relying on `UPDATE OF`. A NULL vector written back by a stale instance is
+# recomputed as well.
+CREATE_TRIGGERS = """
+CREATE TRIGGER giveaways_giveaway_search_vector_insert
+BEFORE INSERT ON giveaways_giveaway
+FOR EACH ROW EXECUTE PROCEDURE giveaways_giveaway_search_vector_trigger();
+
+CREATE TRIGGER giveaways_giveaway_search_vector_update
+BEFORE UPDATE ON giveaways_giveaway
+FOR EACH ROW
+WHEN (
+    OLD.title IS DISTINCT FROM NEW.title
+    OR OLD.description IS DISTINCT FROM NEW.description
+    OR OLD.creator_id IS DISTINCT FROM NEW.creator_id
+    OR NEW.search_vector_column IS NULL
+)
+EXECUTE PROCEDURE giveaways_giveaway_search_vector_trigger();
+
+CREATE TRIGGER accounts_user_search_vector_update
+AFTER UPDATE ON accounts_user
+FOR EACH ROW
+WHEN (
+    OLD.first_name IS DISTINCT FROM NEW.first_name
+    OR OLD.last_name IS DISTINCT FROM NEW.last_name
+)
+EXECUTE PROCEDURE accounts_user_search_vector_trigger();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS accounts_user_search_vector_update ON accounts_user;
+DROP TRIGGER IF EXISTS giveaways_giveaway_search_vector_update ON giveaways_giveaway;
+DROP TRIGGER IF EXISTS giveaways_giveaway_search_vector_insert ON giveaways_giveaway;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP FUNCTION IF EXISTS accounts_user_search_vector_trigger();
+DROP FUNCTION IF EXISTS giveaways_giveaway_search_vector_trigger();
+DROP FUNCTION IF EXISTS giveaways_giveaway_search_vector(text, text, bigint);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("giveaways", "0007_add_unique_account_number_per_giveaway"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH_VECTOR_FUNCTION, DROP_SEARCH_VECTOR_FUNCTION),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.7 on 2021-10-23 10:33
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0008_maintain_search_vector_with_triggers"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="giveaway",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="giveaway_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.7 on 2021-10-24 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0009_add_trigram_index_to_giveaway_title"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="giveaway",
+            index=models.Index(
+                condition=models.Q(("is_public", True)),
+                fields=["-created_at", "-id"],
+                name="giveaway_public_feed_idx",
+            ),
+        ),
+    ]
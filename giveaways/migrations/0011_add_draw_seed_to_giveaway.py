@@ -0,0 +1,25 @@
+# Generated by Django 3.2.7 on 2021-10-25 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0010_add_public_feed_index_to_giveaway"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="giveaway",
+            name="draw_seed",
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name="draw seed"),
+        ),
+        migrations.AddField(
+            model_name="giveaway",
+            name="participants_digest",
+            field=models.CharField(
+                blank=True, max_length=64, null=True, verbose_name="participants digest"
+            ),
+        ),
+    ]
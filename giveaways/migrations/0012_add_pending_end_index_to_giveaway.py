@@ -0,0 +1,21 @@
+# Generated by Django 3.2.7 on 2021-10-25 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0011_add_draw_seed_to_giveaway"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="giveaway",
+            index=models.Index(
+                condition=models.Q(("status", "ENDED"), _negated=True),
+                fields=["end_at"],
+                name="giveaway_pending_end_idx",
+            ),
+        ),
+    ]
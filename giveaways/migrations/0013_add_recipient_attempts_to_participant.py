@@ -0,0 +1,23 @@
+# Generated by Django 3.2.7 on 2021-10-28 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("giveaways", "0012_add_pending_end_index_to_giveaway"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="participant",
+            name="recipient_attempts",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="recipient attempts"),
+        ),
+        migrations.AddField(
+            model_name="participant",
+            name="recipient_retry_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="recipient retry at"),
+        ),
+    ]
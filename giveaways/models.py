@@ -5,7 +5,7 @@ from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models.constraints import CheckConstraint
+from django.db.models.constraints import CheckConstraint, UniqueConstraint
 from django.db.models.expressions import F
 from django.db.models.query_utils import Q
 from django.utils.text import slugify
@@ -51,8 +51,17 @@ class Giveaway(models.Model):
     password = models.CharField(_("password"), max_length=128, blank=True, null=True)
 
     has_winners = models.BooleanField(_("has winners"), default=False)
+    # Inputs of the winner draw, see `giveaways.draws`.
+    draw_seed = models.CharField(_("draw seed"), max_length=64, blank=True, null=True)
+    participants_digest = models.CharField(
+        _("participants digest"), max_length=64, blank=True, null=True
+    )
     paid_winners = models.BooleanField(_("paid winners"), default=False)
 
+    # Denormalized counters kept in sync with `Participant` inserts and eligibility flips.
+    participant_count = models.PositiveIntegerField(_("participant count"), default=0)
+    eligible_count = models.PositiveIntegerField(_("eligible count"), default=0)
+
     status = models.CharField(
         _("status"), max_length=10, choices=GiveawayStatus.choices, default=GiveawayStatus.CREATED
     )
@@ -73,7 +82,20 @@ class Giveaway(models.Model):
         super().save(*args, **kwargs)
 
     class Meta:
-        indexes = [GinIndex(fields=["search_vector_column"])]
+        indexes = [
+            GinIndex(fields=["search_vector_column"]),
+            GinIndex(fields=["title"], name="giveaway_title_trgm_idx", opclasses=["gin_trgm_ops"]),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="giveaway_public_feed_idx",
+                condition=Q(is_public=True),
+            ),
+            models.Index(
+                fields=["end_at"],
+                name="giveaway_pending_end_idx",
+                condition=~Q(status=GiveawayStatus.ENDED),
+            ),
+        ]
 
         constraints = [
             CheckConstraint(
@@ -154,6 +176,17 @@ class Participant(models.Model):
     is_paid = models.BooleanField(_("is paid"), default=False)
 
     recipient_code = models.CharField(_("recipient code"), max_length=40, null=True)
+    # Failed attempts at creating the transfer recipient, retried from `recipient_retry_at`.
+    recipient_attempts = models.PositiveSmallIntegerField(_("recipient attempts"), default=0)
+    recipient_retry_at = models.DateTimeField(_("recipient retry at"), blank=True, null=True)
 
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["giveaway", "account_number"],
+                name="unique_account_number_per_giveaway",
+            )
+        ]
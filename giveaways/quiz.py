@@ -0,0 +1,137 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from core.clients import get_http_session, lazy_redis
+from core.utils import CircuitBreaker
+from django.conf import settings
+from requests.exceptions import RequestException
+
+from .utils import get_quiz_url
+
+logger = logging.getLogger(__name__)
+
+r = lazy_redis()
+
+opentdb_breaker = CircuitBreaker(
+    failure_threshold=settings.QUIZ_API_FAILURE_THRESHOLD,
+    reset_timeout=settings.QUIZ_API_RESET_TIMEOUT,
+)
+
+
+# opentdb `response_code`s, see https://opentdb.com/api_config.php.
+OPENTDB_SUCCESS = 0
+OPENTDB_NOT_ENOUGH_QUESTIONS = 1
+OPENTDB_RATE_LIMITED = 5
+
+
+def get_quiz_pool_key(quiz_choice: int) -> str:
+    return f"quiz:pool:{quiz_choice}"
+
+
+def request_questions(quiz_choice: int, amount: int) -> Tuple[Optional[int], List[dict]]:
+    """Asks opentdb for `amount` raw questions, guarded by `opentdb_breaker`.
+
+    Returns opentdb's `response_code` with the questions, or None if opentdb was not reached.
+    """
+    if not opentdb_breaker.allow_request():
+        return None, []
+
+    try:
+        response = get_http_session().get(
+            get_quiz_url(quiz_choice, amount=amount), timeout=settings.QUIZ_API_TIMEOUT
+        )
+        response.raise_for_status()
+        payload = response.json()
+    except (RequestException, ValueError) as err:
+        logger.warning(f"Unable to fetch quiz questions -> {err}")
+        opentdb_breaker.record_failure()
+        return None, []
+
+    response_code = payload.get("response_code")
+
+    # Being rate limited counts against the breaker, so callers back off instead of hammering.
+    if response_code == OPENTDB_RATE_LIMITED:
+        logger.warning(f"opentdb rate limited a request for category {quiz_choice}")
+        opentdb_breaker.record_failure()
+    else:
+        opentdb_breaker.record_success()
+
+    return response_code, payload.get("results", []) if response_code == OPENTDB_SUCCESS else []
+
+
+def fetch_questions_from_api(quiz_choice: int, amount: int) -> List[dict]:
+    """Fetches `amount` raw questions from opentdb, or none if it cannot provide them."""
+    return request_questions(quiz_choice, amount)[1]
+
+
+def refill_quiz_pool(quiz_choice: int, amount: int) -> Optional[int]:
+    """Tops up the Redis question pool for `quiz_choice` with up to `amount` questions.
+
+    Returns opentdb's `response_code`, or None if the pool is full or opentdb was not reached.
+    """
+    key = get_quiz_pool_key(quiz_choice)
+
+    if r.scard(key) >= settings.QUIZ_POOL_SIZE:
+        return None
+
+    response_code, questions = request_questions(quiz_choice, amount)
+    if questions:
+        r.sadd(key, *[json.dumps(question, sort_keys=True) for question in questions])
+
+    return response_code
+
+
+def get_quiz_questions(quiz_choice: int, amount: int = 4) -> List[dict]:
+    """Draws `amount` distinct raw questions for `quiz_choice`.
+
+    Questions come from the Redis pool kept warm by `refill_quiz_pools`; opentdb is only
+    called when the pool cannot satisfy the draw.
+    """
+    questions = r.srandmember(get_quiz_pool_key(quiz_choice), amount)
+
+    if len(questions) == amount:
+        return [json.loads(question) for question in questions]
+
+    return fetch_questions_from_api(quiz_choice, amount=amount)
+
+
+def get_quiz_attempt_key(attempt_id: str) -> str:
+    return f"quiz:attempt:{attempt_id}"
+
+
+def start_quiz_attempt(questions: dict, answers: Dict[str, str]) -> str:
+    """Stores a quiz attempt as one Redis hash that expires after `QUIZ_ATTEMPT_TTL`.
+
+    The hash maps each question id to its answer, next to the rendered `questions` the quiz
+    form is rebuilt from. Returns the attempt id, which is all the session has to carry.
+    """
+    key = get_quiz_attempt_key(questions["id"])
+
+    with r.pipeline() as pipe:
+        pipe.hset(key, mapping={**answers, "questions": json.dumps(questions)})
+        pipe.expire(key, settings.QUIZ_ATTEMPT_TTL)
+        pipe.execute()
+
+    return questions["id"]
+
+
+def consume_quiz_attempt(attempt_id: str) -> Optional[Tuple[dict, Dict[str, str]]]:
+    """Reads and deletes a quiz attempt in one transaction, so it can only be scored once.
+
+    Returns `(questions, answers)`, or None if the attempt expired or was already consumed.
+    """
+    key = get_quiz_attempt_key(attempt_id)
+
+    with r.pipeline() as pipe:
+        pipe.hgetall(key)
+        pipe.delete(key)
+        attempt, deleted = pipe.execute()
+
+    if not deleted:
+        return None
+
+    questions = json.loads(attempt.pop(b"questions"))
+    answers = {key.decode(): value.decode() for key, value in attempt.items()}
+
+    return questions, answers
@@ -0,0 +1,126 @@
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+from core.clients import lazy_redis
+from django.conf import settings
+from redis.client import Script
+
+from .enums import AdmissionStatus
+
+r = lazy_redis()
+
+# KEYS: holds, hold, failed. ARGV: now, expires_at, ttl, capacity, account_number, *field pairs.
+# Expired holds are pruned first, so abandoned quizzes hand their slots back on the next join.
+HOLD_SLOT = """
+    if redis.call('EXISTS', KEYS[3]) == 1 then
+        return 'FAILED'
+    end
+
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+
+    if redis.call('ZSCORE', KEYS[1], ARGV[5]) then
+        return 'DUPLICATE'
+    end
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+        return 'FULL'
+    end
+
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[5])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('HSET', KEYS[2], unpack(ARGV, 6))
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+
+    return 'RESERVED'
+    """
+
+# KEYS: holds, hold, failed. ARGV: now, account_number, cooldown (0 when the quiz was passed).
+RELEASE_SLOT = """
+    if tonumber(ARGV[3]) > 0 then
+        redis.call('SET', KEYS[3], 1, 'EX', ARGV[3])
+    end
+
+    local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[2])
+    redis.call('ZREM', KEYS[1], ARGV[2])
+
+    local hold = redis.call('HGETALL', KEYS[2])
+    redis.call('DEL', KEYS[2])
+
+    if not expires_at or tonumber(expires_at) <= tonumber(ARGV[1]) then
+        return {}
+    end
+    return hold
+    """
+
+
+@lru_cache(maxsize=None)
+def get_script(source: str) -> Script:
+    """Registers a Lua script on first use, so importing this module resolves no Redis client."""
+    return r.register_script(source)
+
+
+def get_holds_key(giveaway_id: int) -> str:
+    return f"giveaway:{giveaway_id}:holds"
+
+
+def get_hold_key(giveaway_id: int, account_number: str) -> str:
+    return f"giveaway:{giveaway_id}:hold:{account_number}"
+
+
+def get_failed_key(giveaway_id: int, account_number: str) -> str:
+    return f"giveaway:{giveaway_id}:failed:{account_number}"
+
+
+def hold_slot(giveaway, account_number: str, **fields) -> AdmissionStatus:
+    """Holds a slot on `giveaway` for `account_number` for `QUIZ_RESERVATION_TTL` seconds.
+
+    Holds are a sorted set of account numbers scored by expiry, next to one hash per hold with
+    the participant's verified details. Only the slots left after `participant_count` can be
+    held, the conditional `UPDATE` in `admit_participant` stays the final word on capacity.
+    Account numbers that failed the quiz within `QUIZ_RETRY_COOLDOWN` seconds are refused.
+    """
+    now = time.time()
+    ttl = settings.QUIZ_RESERVATION_TTL
+
+    pairs = []
+    for field, value in {**fields, "account_number": account_number}.items():
+        pairs.extend((field, value))
+
+    status = get_script(HOLD_SLOT)(
+        keys=[
+            get_holds_key(giveaway.pk),
+            get_hold_key(giveaway.pk, account_number),
+            get_failed_key(giveaway.pk, account_number),
+        ],
+        args=[
+            now,
+            now + ttl,
+            ttl,
+            giveaway.number_of_participants - giveaway.participant_count,
+            account_number,
+            *pairs,
+        ],
+    )
+    return AdmissionStatus(status.decode())
+
+
+def release_slot(
+    giveaway_id: int, account_number: str, failed: bool = False
+) -> Optional[Dict[str, str]]:
+    """Drops the hold of `account_number` and returns its details, or None if it had expired.
+
+    Releasing the hold of a `failed` quiz also refuses new holds for `QUIZ_RETRY_COOLDOWN`
+    seconds, so that failing a quiz never hands out another attempt at it.
+    """
+    hold = get_script(RELEASE_SLOT)(
+        keys=[
+            get_holds_key(giveaway_id),
+            get_hold_key(giveaway_id, account_number),
+            get_failed_key(giveaway_id, account_number),
+        ],
+        args=[time.time(), account_number, settings.QUIZ_RETRY_COOLDOWN if failed else 0],
+    )
+    if not hold:
+        return None
+
+    return {field.decode(): value.decode() for field, value in zip(hold[::2], hold[1::2])}
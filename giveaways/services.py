@@ -0,0 +1,112 @@
+from typing import NamedTuple, Optional
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .cache import invalidate_giveaway_cache
+from .draws import (
+    derive_draw_seed,
+    get_participants_digest,
+    iter_eligible_participant_ids,
+    sample_winner_ids,
+)
+from .enums import AdmissionStatus, GiveawayStatus
+from .models import Giveaway, Participant
+from .reservations import hold_slot, release_slot
+
+# Namespace of the `pg_try_advisory_xact_lock(namespace, giveaway_id)` locks held during draws.
+WINNER_DRAW_LOCK_NAMESPACE = 1
+
+
+class Admission(NamedTuple):
+    status: AdmissionStatus
+    participant: Optional[Participant] = None
+
+
+def admit_participant(giveaway: Giveaway, **fields) -> Admission:
+    """Reserves a slot on `giveaway` and creates the participant in the same transaction.
+
+    The slot is taken with a conditional `UPDATE` on `participant_count`, so concurrent joins
+    queue on the giveaway's row lock only for the duration of the `INSERT` that follows.
+    A duplicate account number trips `unique_account_number_per_giveaway`, which rolls back
+    the reserved slot along with it.
+    """
+    is_eligible = fields.get("is_eligible", False)
+
+    try:
+        with transaction.atomic():
+            reserved = Giveaway.objects.filter(
+                pk=giveaway.pk, participant_count__lt=F("number_of_participants")
+            ).update(
+                participant_count=F("participant_count") + 1,
+                eligible_count=F("eligible_count") + int(is_eligible),
+            )
+
+            if not reserved:
+                return Admission(AdmissionStatus.FULL)
+
+            new_participant = Participant.objects.create(giveaway=giveaway, **fields)
+            invalidate_giveaway_cache(giveaway.pk)
+    except IntegrityError:
+        return Admission(AdmissionStatus.DUPLICATE)
+
+    return Admission(AdmissionStatus.ADMITTED, new_participant)
+
+
+def reserve_participant(giveaway: Giveaway, **fields) -> Admission:
+    """Holds a slot on a quiz giveaway in Redis until the participant passes the quiz.
+
+    Nothing is written to PostgreSQL until `admit_reserved_participant`, so failed and
+    abandoned quizzes cost no rows and their slots return once the hold expires.
+    """
+    if giveaway.participants.filter(account_number=fields["account_number"]).exists():
+        return Admission(AdmissionStatus.DUPLICATE)
+
+    return Admission(hold_slot(giveaway, **fields))
+
+
+def admit_reserved_participant(giveaway: Giveaway, account_number: str) -> Admission:
+    """Turns the hold of a participant who passed the quiz into an eligible participant."""
+    fields = release_slot(giveaway.pk, account_number)
+
+    if fields is None:
+        return Admission(AdmissionStatus.EXPIRED)
+
+    return admit_participant(giveaway, **fields, is_eligible=True)
+
+
+def draw_winners(giveaway: Giveaway) -> bool:
+    """Picks the winners of an ended giveaway with a seeded, replayable draw.
+
+    Runs in a single transaction holding the giveaway's advisory lock, so concurrent draws skip
+    the giveaway instead of queueing behind it. The seed and the participants digest it was
+    derived from are stored alongside `has_winners` so that `replay_draw` can reproduce the
+    draw. Returns whether this call drew the winners.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_try_advisory_xact_lock(%s, %s)",
+                [WINNER_DRAW_LOCK_NAMESPACE, giveaway.pk],
+            )
+            if not cursor.fetchone()[0]:
+                return False
+
+        participants_digest = get_participants_digest(giveaway.pk)
+        draw_seed = derive_draw_seed(giveaway.slug, giveaway.end_at, participants_digest)
+
+        claimed = Giveaway.objects.filter(
+            pk=giveaway.pk, status=GiveawayStatus.ENDED, has_winners=False
+        ).update(has_winners=True, draw_seed=draw_seed, participants_digest=participants_digest)
+        if not claimed:
+            return False
+
+        # Fewer eligible participants than `number_of_winners` simply makes all of them winners.
+        winner_ids = sample_winner_ids(
+            draw_seed, iter_eligible_participant_ids(giveaway.pk), giveaway.number_of_winners
+        )
+        Participant.objects.filter(pk__in=winner_ids).update(is_winner=True)
+
+        invalidate_giveaway_cache(giveaway.pk)
+
+    return True
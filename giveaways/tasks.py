@@ -1,54 +1,100 @@
-import random
-
-from django.db.models import Q
+from core.queues import TaskPriority, db_periodic_task, db_task, periodic_task, task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from huey import crontab
-from huey.contrib.djhuey import db_periodic_task
 from payments.enums import TransactionStatus
+from payments.models import Transaction
 
+from .cache import invalidate_giveaway_cache
+from .enums import QuizChoices
 from .models import Giveaway, GiveawayStatus
+from .quiz import OPENTDB_NOT_ENOUGH_QUESTIONS, OPENTDB_RATE_LIMITED, refill_quiz_pool
+from .services import draw_winners
+
+
+def get_drawable_giveaways():
+    # `EXISTS` rather than a join, so several successful top ups do not repeat a giveaway.
+    topped_up = Transaction.objects.filter(
+        giveaway=OuterRef("pk"),
+        narration__startswith="top_up_",
+        status=TransactionStatus.SUCCESS,
+    )
+    return Giveaway.objects.filter(
+        Exists(topped_up),
+        has_winners=False,
+        status=GiveawayStatus.ENDED,
+        eligible_count__gt=0,
+    ).only("pk", "slug", "end_at", "number_of_winners")
+
+
+def schedule_giveaway_expiry(giveaway: Giveaway) -> None:
+    """Enqueues `end_giveaway` for `end_at` once the transaction activating `giveaway` commits."""
+    transaction.on_commit(lambda: end_giveaway.schedule((giveaway.pk,), eta=giveaway.end_at))
+
+
+@db_task("maintenance", priority=TaskPriority.HIGH)
+def end_giveaway(giveaway_id: int):
+    ended = Giveaway.objects.filter(
+        pk=giveaway_id, status=GiveawayStatus.ACTIVE, end_at__lte=timezone.now()
+    ).update(status=GiveawayStatus.ENDED)
+
+    if ended:
+        invalidate_giveaway_cache(giveaway_id)
+        draw_giveaway_winners(giveaway_id)
+
 
+@db_task("maintenance", priority=TaskPriority.HIGH)
+def draw_giveaway_winners(giveaway_id: int):
+    for giveaway in get_drawable_giveaways().filter(pk=giveaway_id):
+        draw_winners(giveaway)
 
-@db_periodic_task(crontab(minute="*/3"))
+
+@db_periodic_task("maintenance", crontab(minute="*/15"))
 def change_giveaway_status_on_expiry():
+    """Backstop for `end_giveaway` tasks lost to a flushed or restarted queue."""
     now = timezone.now()
 
-    all_giveaways = Giveaway.objects.exclude(
-        Q(status=GiveawayStatus.ENDED) | Q(end_at__gt=now)
-    ).update(status=GiveawayStatus.ENDED)
+    # Served by `giveaway_pending_end_idx`, only giveaways that have yet to end are scanned.
+    expired_giveaways = list(
+        Giveaway.objects.exclude(status=GiveawayStatus.ENDED)
+        .filter(status=GiveawayStatus.ACTIVE, end_at__lte=now)
+        .values_list("pk", flat=True)
+    )
+    for giveaway_id in expired_giveaways:
+        end_giveaway(giveaway_id)
 
 
-@db_periodic_task(crontab(minute="*/5"))
+@db_periodic_task("maintenance", crontab(minute="0"))
 def select_giveaway_winners():
-    ended_giveaways = (
-        Giveaway.objects.prefetch_related("participants")
-        .filter(
-            has_winners=False,
-            status=GiveawayStatus.ENDED,
-            transactions__narration__startswith="top_up_",
-            transactions__status=TransactionStatus.SUCCESS,
+    """Backstop for draws that `end_giveaway` could not chain, e.g. top ups confirmed late."""
+    for giveaway in get_drawable_giveaways():
+        draw_winners(giveaway)
+
+
+@periodic_task("maintenance", crontab(minute="*/10"), priority=TaskPriority.LOW)
+def refill_quiz_pools():
+    # opentdb allows one request every `QUIZ_API_REQUEST_INTERVAL` seconds per IP, so the
+    # categories are spread out rather than refilled back to back by one worker.
+    for index, quiz_choice in enumerate(QuizChoices.values):
+        refill_category_quiz_pool.schedule(
+            (quiz_choice,), delay=index * settings.QUIZ_API_REQUEST_INTERVAL
         )
-        .all()
-    )
 
-    for giveaway in ended_giveaways:
-        no_of_winners = giveaway.number_of_winners
-        eligible_participants = giveaway.participants.filter(is_eligible=True)
-
-        if eligible_participants.count() > 0:
-            # update no_of_winners when eligible participants are less than the required.
-            no_of_winners = (
-                eligible_participants.count()
-                if eligible_participants.count() < no_of_winners
-                else no_of_winners
-            )
-
-            winners = random.sample(
-                list(eligible_participants.values_list("account_number", flat=True)),
-                k=no_of_winners,
-            )
-            winners = eligible_participants.filter(account_number__in=winners).update(
-                is_winner=True
-            )
-            giveaway.has_winners = True
-            giveaway.save()
+
+@task("maintenance", priority=TaskPriority.LOW)
+def refill_category_quiz_pool(quiz_choice: int, amount: int = None):
+    amount = amount or settings.QUIZ_POOL_BATCH_SIZE
+    response_code = refill_quiz_pool(quiz_choice, amount)
+
+    # Retries wait for the other categories of the sweep to have had their turn.
+    delay = len(QuizChoices.values) * settings.QUIZ_API_REQUEST_INTERVAL
+
+    # Small categories hold fewer questions than a batch, ask for fewer until they answer.
+    if response_code == OPENTDB_NOT_ENOUGH_QUESTIONS and amount > 1:
+        refill_category_quiz_pool.schedule((quiz_choice, amount // 2), delay=delay)
+
+    # Repeated rate limits open `opentdb_breaker`, which ends the retries until the next sweep.
+    elif response_code == OPENTDB_RATE_LIMITED:
+        refill_category_quiz_pool.schedule((quiz_choice, amount), delay=delay * 2)
@@ -1,3 +1,231 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from core.testing import flush_test_redis
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .draws import derive_draw_seed, sample_winner_ids
+from .enums import AdmissionStatus, GiveawayStatus
+from .models import Giveaway
+from .reservations import release_slot
+from .services import admit_participant, admit_reserved_participant, reserve_participant
+from .utils import calculate_quiz_score, format_questions_and_answers
+
+
+class AdmitParticipantConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        creator = get_user_model().objects.create_user(
+            username="creator",
+            email="creator@giveaway.app",
+            password="password",
+            first_name="Giveaway",
+            last_name="Creator",
+        )
+        self.giveaway = Giveaway.objects.create(
+            title="Concurrent giveaway",
+            number_of_participants=10,
+            number_of_winners=2,
+            creator=creator,
+            status=GiveawayStatus.ACTIVE,
+            end_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def admit(self, account_number):
+        try:
+            return admit_participant(
+                self.giveaway,
+                name="Participant",
+                email="participant@giveaway.app",
+                bank_code="044",
+                account_number=account_number,
+                is_eligible=True,
+            ).status
+        finally:
+            connection.close()
+
+    def hammer(self, account_numbers):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            return list(executor.map(self.admit, account_numbers))
+
+    def test_admissions_never_exceed_number_of_participants(self):
+        statuses = self.hammer([f"{i:010d}" for i in range(50)])
+
+        self.giveaway.refresh_from_db()
+        self.assertEqual(statuses.count(AdmissionStatus.ADMITTED), 10)
+        self.assertEqual(statuses.count(AdmissionStatus.FULL), 40)
+        self.assertEqual(self.giveaway.participant_count, 10)
+        self.assertEqual(self.giveaway.eligible_count, 10)
+        self.assertEqual(self.giveaway.participants.count(), 10)
+
+    def test_duplicate_account_numbers_are_admitted_once(self):
+        statuses = self.hammer(["0123456789"] * 20)
+
+        self.giveaway.refresh_from_db()
+        self.assertEqual(statuses.count(AdmissionStatus.ADMITTED), 1)
+        self.assertEqual(statuses.count(AdmissionStatus.DUPLICATE), 19)
+        self.assertEqual(self.giveaway.participant_count, 1)
+        self.assertEqual(self.giveaway.participants.count(), 1)
+
+
+class QuizReservationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        creator = get_user_model().objects.create_user(
+            username="creator",
+            email="creator@giveaway.app",
+            password="password",
+            first_name="Giveaway",
+            last_name="Creator",
+        )
+        cls.giveaway = Giveaway.objects.create(
+            title="Quiz giveaway",
+            number_of_participants=2,
+            number_of_winners=1,
+            creator=creator,
+            is_category_quiz=True,
+            status=GiveawayStatus.ACTIVE,
+            end_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def setUp(self):
+        flush_test_redis()
+
+    def reserve(self, account_number):
+        return reserve_participant(
+            self.giveaway,
+            name="Participant",
+            email="participant@giveaway.app",
+            bank_code="044",
+            account_number=account_number,
+        ).status
+
+    def test_holds_are_bounded_by_free_slots(self):
+        self.assertEqual(self.reserve("0000000001"), AdmissionStatus.RESERVED)
+        self.assertEqual(self.reserve("0000000001"), AdmissionStatus.DUPLICATE)
+        self.assertEqual(self.reserve("0000000002"), AdmissionStatus.RESERVED)
+        self.assertEqual(self.reserve("0000000003"), AdmissionStatus.FULL)
+        self.assertFalse(self.giveaway.participants.exists())
+
+    def test_passing_the_quiz_creates_an_eligible_participant(self):
+        self.reserve("0000000001")
+
+        admission = admit_reserved_participant(self.giveaway, "0000000001")
+
+        self.assertEqual(admission.status, AdmissionStatus.ADMITTED)
+        self.assertTrue(admission.participant.is_eligible)
+        self.assertEqual(
+            admit_reserved_participant(self.giveaway, "0000000001").status,
+            AdmissionStatus.EXPIRED,
+        )
+
+    def test_failing_the_quiz_refuses_new_holds(self):
+        self.reserve("0000000001")
+
+        release_slot(self.giveaway.pk, "0000000001", failed=True)
+
+        self.assertEqual(self.reserve("0000000001"), AdmissionStatus.FAILED)
+        self.assertEqual(self.reserve("0000000002"), AdmissionStatus.RESERVED)
+
+
+class WinnerDrawTestCase(SimpleTestCase):
+    def test_draw_is_reproducible_from_its_seed(self):
+        end_at = timezone.now()
+        seed = derive_draw_seed("lucky-friday-cash", end_at, "digest")
+
+        self.assertEqual(seed, derive_draw_seed("lucky-friday-cash", end_at, "digest"))
+        self.assertEqual(
+            sample_winner_ids(seed, range(1, 10_001), 5),
+            sample_winner_ids(seed, iter(range(1, 10_001)), 5),
+        )
+
+    def test_draw_never_picks_more_than_the_candidates(self):
+        self.assertEqual(sorted(sample_winner_ids("seed", range(3), 5)), [0, 1, 2])
+
+
+class QuizScoreTestCase(SimpleTestCase):
+    def test_answers_are_scored_by_question_id(self):
+        questions, answers = format_questions_and_answers(
+            [
+                {
+                    "question": f"Question {i}",
+                    "incorrect_answers": ["A", "B"],
+                    "correct_answer": "C",
+                }
+                for i in range(4)
+            ]
+        )
+        attempts = {
+            f"question={question['id']}": "C" if index % 2 else "A"
+            for index, question in enumerate(questions["questions"])
+        }
+
+        self.assertEqual(set(answers), {question["id"] for question in questions["questions"]})
+        self.assertEqual(calculate_quiz_score(attempts, answers), 50)
+        self.assertEqual(calculate_quiz_score({}, answers), 0)
+
+
+class HotPathQueryBudgetTestCase(TestCase):
+    """Guards the number of queries of the pages `loadtest` drives, so N+1s fail fast."""
+
+    @classmethod
+    def setUpTestData(cls):
+        creator = get_user_model().objects.create_user(
+            username="creator",
+            email="creator@giveaway.app",
+            password="password",
+            first_name="Giveaway",
+            last_name="Creator",
+        )
+        cls.giveaway = Giveaway.objects.create(
+            title="Birthday cash giveaway",
+            slug="birthday-cash-giveaway",
+            number_of_participants=10,
+            number_of_winners=2,
+            creator=creator,
+            status=GiveawayStatus.ACTIVE,
+            end_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def setUp(self):
+        flush_test_redis()
+
+    def assertMaxQueries(self, budget, method, path, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, data)
+
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(
+            len(context.captured_queries),
+            budget,
+            "\n".join(query["sql"] for query in context.captured_queries),
+        )
+        return response
+
+    def test_search(self):
+        self.assertMaxQueries(1, "get", reverse("giveaways:search-giveaway"), {"q": "birthday"})
+
+    def test_display(self):
+        path = reverse("giveaways:view-giveaway", kwargs={"slug": self.giveaway.slug})
+        self.assertMaxQueries(3, "get", path)
+
+    def test_join_form(self):
+        path = reverse("giveaways:join-giveaway", kwargs={"slug": self.giveaway.slug})
+        self.assertMaxQueries(1, "get", path)
+
+    @mock.patch("giveaways.forms.verify_nuban_and_bank", return_value=(True, "Participant"))
+    def test_join(self, verify_nuban_and_bank):
+        path = reverse("giveaways:join-giveaway", kwargs={"slug": self.giveaway.slug})
+        data = {
+            "join_giveaway_pre-email": "participant@giveaway.app",
+            "join_giveaway_pre-account_number": "0123456789",
+            "join_giveaway_pre-bank": "044",
+        }
+
+        self.assertMaxQueries(6, "post", path, data)
+        self.assertTrue(self.giveaway.participants.filter(account_number="0123456789").exists())
@@ -1,15 +1,15 @@
 import datetime
 import html
 import random
-from operator import itemgetter
-from typing import Tuple
+from typing import Dict, Tuple
 from uuid import uuid4
 
-import requests
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from payments.services import paystack
 
 from .enums import DurationType, GiveawayCategory, QuizChoices
 from .models import Giveaway, MonetaryPrize, QuizCategory
@@ -20,6 +20,23 @@ def generate_hex() -> str:
     return "%0x" % random.getrandbits(25)
 
 
+def get_giveaway_for_request(request, slug: str) -> Giveaway:
+    """Utility function that loads a giveaway once per request and caches it on the request.
+
+    The join decorators and `JoinGiveawayView` all resolve the giveaway through this function,
+    so a single join request costs one `SELECT` no matter how many rules are checked against it.
+    """
+    cache = request.__dict__.setdefault("_giveaways", {})
+
+    if slug not in cache:
+        cache[slug] = get_object_or_404(
+            Giveaway.objects.select_related("creator", "quiz_category", "monetary_prize"),
+            slug=slug,
+        )
+
+    return cache[slug]
+
+
 def show_quiz_step_if_category(wizard) -> bool:
     """Utility function that adds `CreateGiveawayQuizCategoryForm` if `category` is QUIZ"""
 
@@ -100,21 +117,20 @@ def create_new_giveaway(user, forms) -> Giveaway:
     return new_giveaway
 
 
-def get_quiz_url(quiz_choice: str) -> str:
+def get_quiz_url(quiz_choice: str, amount: int = 4) -> str:
     """Utility function that returns the API endpoint to get quiz based on choice of quiz."""
     if quiz_choice == QuizChoices.RANDOM:
-        quiz_url = "https://opentdb.com/api.php?amount=4&difficulty=easy&type=multiple"
+        quiz_url = f"{settings.QUIZ_API_URL}?amount={amount}&difficulty=easy&type=multiple"
     else:
-        quiz_url = f"https://opentdb.com/api.php?amount=4&category={quiz_choice}&difficulty=easy&type=multiple"
+        quiz_url = f"{settings.QUIZ_API_URL}?amount={amount}&category={quiz_choice}&difficulty=easy&type=multiple"
 
     return quiz_url
 
 
-def format_questions_and_answers(data) -> Tuple[dict, dict]:
-    """Utility function that formats quiz questions and its answers."""
-    quiz_id = str(uuid4())
-    final_questions = {"id": quiz_id, "questions": []}
-    final_answers = {"quiz_id": quiz_id, "answers": []}
+def format_questions_and_answers(data) -> Tuple[dict, Dict[str, str]]:
+    """Utility function that formats quiz questions and maps each question id to its answer."""
+    final_questions = {"id": str(uuid4()), "questions": []}
+    final_answers = {}
 
     for question in data:
         question_id = str(uuid4())
@@ -124,41 +140,32 @@ def format_questions_and_answers(data) -> Tuple[dict, dict]:
         correct_answer = html.unescape(question["correct_answer"])
         options.append(correct_answer)
 
-        final_answers["answers"].append({"question_id": question_id, "answer": correct_answer})
+        final_answers[question_id] = correct_answer
         final_questions["questions"].append({"id": question_id, "question": q, "options": options})
 
     return final_questions, final_answers
 
 
-def calculate_quiz_score(attempts, answers) -> float:
-    """Utility function that calculates the score of a taken quiz."""
-    score = 0
+def calculate_quiz_score(attempts: dict, answers: Dict[str, str]) -> float:
+    """Utility function that calculates the percentage score of a taken quiz.
 
-    cleaned_attempts = [
-        {"question_id": key.split("=")[-1], "answer": value} for key, value in attempts.items()
-    ]
-    sorted_attempts = sorted(cleaned_attempts, key=itemgetter("question_id"))
-    sorted_answers = sorted(answers, key=itemgetter("question_id"))
+    `attempts` is the cleaned data of `JoinGiveawayQuizForm`, keyed `question=<question_id>`.
+    """
+    if not answers:
+        return 0
 
-    for item in zip(sorted_answers, sorted_attempts):
-        if item[0]["answer"] == item[1]["answer"]:
-            score += 10
-    return (score / 40) * 100
+    correct = sum(
+        attempts.get(f"question={question_id}") == answer
+        for question_id, answer in answers.items()
+    )
+    return correct / len(answers) * 100
 
 
 def verify_nuban_and_bank(nuban: str, bank_code: str) -> Tuple[bool, str]:
-    headers = {
-        "content-type": "application/json",
-        "authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-    }
-    params = {"account_number": nuban, "bank_code": bank_code}
-
-    response = requests.get(
-        f"{settings.PAYSTACK_URL}/bank/resolve", headers=headers, params=params
-    )
-    response_data = response.json()
+    """Utility function that resolves the account name of `nuban` at `bank_code`."""
+    return paystack.resolve_bank_account(nuban, bank_code)
 
-    if response_data["status"]:
-        return True, response_data["data"]["account_name"]
 
-    return False, ""
+async def averify_nuban_and_bank(nuban: str, bank_code: str) -> Tuple[bool, str]:
+    """Async variant of `verify_nuban_and_bank`."""
+    return await paystack.aresolve_bank_account(nuban, bank_code)
@@ -1,20 +1,17 @@
-import json
-
-import redis
-import requests
-from django.conf import settings
+from core.pagination import CursorPaginationMixin
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views import generic
 from formtools.wizard import views
 from payments.services import paystack
-from payments.tasks import populate_recipient_code
+from payments.tasks import prepare_topup_url
 
-from .decorators import giveaway_is_active, giveaway_participants_limit, participant_is_not_creator
-from .enums import GiveawayStatus
+from .cache import attach_cache_versions
+from .decorators import giveaway_is_joinable
+from .enums import AdmissionStatus, GiveawayStatus
 from .forms import (
     CreateGiveawayAddPasswordForm,
     CreateGiveawayBasicInformationForm,
@@ -24,18 +21,19 @@ from .forms import (
     JoinGiveawayQuizForm,
     PrivateGiveawayEntryForm,
 )
-from .models import Giveaway, Participant
+from .models import Giveaway
+from .quiz import consume_quiz_attempt, get_quiz_questions, start_quiz_attempt
+from .reservations import release_slot
+from .services import admit_participant, admit_reserved_participant, reserve_participant
 from .utils import (
     calculate_quiz_score,
     create_new_giveaway,
     format_questions_and_answers,
-    get_quiz_url,
+    get_giveaway_for_request,
     show_add_password_if_not_public,
     show_quiz_step_if_category,
 )
 
-r = redis.StrictRedis.from_url(settings.REDIS_URL)
-
 
 @method_decorator(login_required, name="dispatch")
 class CreateGiveawayView(views.SessionWizardView):
@@ -61,6 +59,7 @@ class CreateGiveawayView(views.SessionWizardView):
     def done(self, form_list, **kwargs):
         form_dict = kwargs.get("form_dict")
         new_giveaway = create_new_giveaway(self.request.user, form_dict)
+        prepare_topup_url(new_giveaway.pk)
 
         return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": new_giveaway.slug}))
 
@@ -80,20 +79,27 @@ class DisplayGiveawayView(generic.DetailView):
 
         _object = context["giveaway"]
         context["title"] = f"{_object.title} | Giveaway"
+        attach_cache_versions([_object])
 
         if (
             _object.creator.username == self.request.user.username
             and _object.status == GiveawayStatus.CREATED
         ):
-            context["topup_url"] = paystack.create_new_transaction(_object)
+            context["topup_url"] = paystack.get_cached_topup_url(_object)
 
         return context
 
 
-@method_decorator(
-    [participant_is_not_creator, giveaway_is_active, giveaway_participants_limit], name="dispatch"
-)
-class JoinGiveawayView(generic.TemplateView):
+class GiveawayFromRequestMixin:
+    """Exposes the giveaway resolved once per request by `get_giveaway_for_request`."""
+
+    @property
+    def giveaway(self):
+        return get_giveaway_for_request(self.request, self.kwargs.get("slug"))
+
+
+@method_decorator(giveaway_is_joinable, name="dispatch")
+class JoinGiveawayView(GiveawayFromRequestMixin, generic.TemplateView):
     template_name = "giveaways/join.html"
 
     join_giveaway_form = JoinGiveawayForm
@@ -103,8 +109,8 @@ class JoinGiveawayView(generic.TemplateView):
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         # This is basically a check against `get_context_data` method whereby
-        # the API request to get questions does not return a status code of 200.
-        if context["giveaway"].is_category_quiz and not context.get("quiz_form"):
+        # neither the question pool nor the quiz API could provide questions.
+        if self.is_taking_quiz() and not context.get("quiz_form"):
             messages.error(
                 request, "Unable to get quiz at the moment. Please try again after a while."
             )
@@ -115,11 +121,7 @@ class JoinGiveawayView(generic.TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["giveaway"] = get_object_or_404(
-            Giveaway.objects.select_related("creator", "quiz_category"),
-            slug=self.kwargs.get("slug"),
-        )
-        giveaway = context["giveaway"]
+        context["giveaway"] = giveaway = self.giveaway
 
         context["title"] = f"Join {giveaway.title}| Giveaway"
         context["join_giveaway_form"] = self.join_giveaway_form(prefix="join_giveaway_pre")
@@ -127,31 +129,29 @@ class JoinGiveawayView(generic.TemplateView):
             prefix="private_entry_pre", giveaway=giveaway
         )
 
-        if giveaway.is_category_quiz:
-            quiz_url = get_quiz_url(giveaway.quiz_category.choice)
-            response = requests.get(quiz_url)
+        # Questions are only drawn once the participant's details have been taken.
+        if self.is_taking_quiz():
+            quiz_questions = get_quiz_questions(giveaway.quiz_category.choice)
 
-            if response.status_code == 200:
-                questions, answers = format_questions_and_answers(response.json()["results"])
+            if quiz_questions:
+                questions, answers = format_questions_and_answers(quiz_questions)
 
-                # store answers in redis
-                r.set(f'quiz:{answers["quiz_id"]}', json.dumps(answers))
-
-                # Store the questions in session.
-                # They are deleted on every valid or tampered `POST` request.
-                self.request.session["questions"] = questions
+                # The attempt lives in Redis, the session only carries its id.
+                # It is consumed by the `POST` request that submits the quiz.
+                self.request.session["quiz_attempt"] = start_quiz_attempt(questions, answers)
 
                 context["quiz_form"] = self.quiz_form(questions=questions, prefix="quiz_pre")
 
         return context
 
+    def is_taking_quiz(self) -> bool:
+        return self.giveaway.is_category_quiz and "account_number" in self.request.session
+
     def post(self, *args, **kwargs):
-        quiz_form = None
-        context = {}
-        giveaway = self.get_context_data()["giveaway"]
+        giveaway = self.giveaway
 
-        if giveaway.is_category_quiz:
-            quiz_form = self.get_form(self.request, self.quiz_form, prefix="quiz_pre")
+        if self.is_taking_quiz() and "quiz_pre-quiz_id" in self.request.POST:
+            return self.submit_quiz(giveaway)
 
         private_giveaway_entry_form = self.get_form(
             self.request, self.private_giveaway_entry_form, "private_entry_pre"
@@ -165,125 +165,113 @@ class JoinGiveawayView(generic.TemplateView):
             return redirect(reverse("giveaways:join-giveaway", kwargs={"slug": giveaway.slug}))
 
         elif join_giveaway_form.is_valid():
-            # If the giveaway contains quiz. The participant is created with a flag `is_eligible=False`,
-            # the flag will updated when the quiz has been answered.
-            # Otherwise the flag `is_eligible=True` if no quiz is present.
+            # If the giveaway contains quiz, a slot is only held for the participant,
+            # who is created once the quiz has been passed.
+            # Otherwise the participant is created right away.
             if giveaway.is_category_quiz:
-
-                # checks if participant already registered with that account number for the giveaway
-                participant_exists = giveaway.participants.filter(
-                    account_number=join_giveaway_form.cleaned_data.get("account_number")
-                ).exists()
-                if not participant_exists:
-                    new_participant = Participant.objects.create(
-                        **join_giveaway_form.cleaned_data, giveaway=giveaway
-                    )
-                    self.request.session["account_number"] = new_participant.account_number
-                    return redirect(
-                        reverse("giveaways:join-giveaway", kwargs={"slug": giveaway.slug})
-                    )
-
-                join_giveaway_form.add_error(
-                    None, "You cannot use the same account number multiple times."
-                )
+                admission = reserve_participant(giveaway, **join_giveaway_form.cleaned_data)
             else:
-                participant_exists = giveaway.participants.filter(
-                    account_number=join_giveaway_form.cleaned_data.get("account_number")
-                ).exists()
-
-                if not participant_exists:
-                    new_participant = Participant.objects.create(
-                        **join_giveaway_form.cleaned_data, giveaway=giveaway, is_eligible=True
-                    )
-
-                    # generate the recipient_code for this participant
-                    populate_recipient_code.schedule((new_participant.id), delay=2)
-
-                    messages.success(
-                        self.request,
-                        "You have successfully joined this giveaway. You will contacted via email if selected. Goodluck!",
-                    )
-
-                    #######################################
-                    self.request.session.pop(giveaway.slug, None)
-                    self.request.session.pop("account_number", None)
-                    #######################################
-
-                    return redirect(
-                        reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug})
-                    )
-
-                join_giveaway_form.add_error(
-                    None, "You cannot use the same account number multiple times."
+                admission = admit_participant(
+                    giveaway, **join_giveaway_form.cleaned_data, is_eligible=True
                 )
 
-        # First checks if there is a quiz form based on the giveaway.
-        # Then checks if the form is valid.
-        elif quiz_form and quiz_form.is_valid():
-
-            # using POST data directly instead of `cleaned_data` property of the form.
-            # there's a bug somewhere though.
-            cleaned_data = self.request.POST.copy().dict()
-            quiz_id = cleaned_data.pop("quiz_pre-quiz_id")
-
-            redis_quiz_answers = r.get(f"quiz:{quiz_id}")
+            if admission.status == AdmissionStatus.FULL:
+                messages.error(
+                    self.request,
+                    "The maximum number of participants for this giveaway has been reached. Better luck next time!",
+                )
+                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
-            # if the quiz answers are not present in redis
-            # or the field was tampered with by the user.
-            if not redis_quiz_answers:
+            elif admission.status == AdmissionStatus.FAILED:
                 messages.error(
-                    self.request, "Sorry, something went wrong validating quiz answers."
+                    self.request,
+                    "You did not pass the quiz of this giveaway and cannot retry it yet.",
                 )
-                # delete the questions from session.
-                del self.request.session["questions"]
+                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
+            elif admission.status == AdmissionStatus.RESERVED:
+                self.request.session["account_number"] = join_giveaway_form.cleaned_data[
+                    "account_number"
+                ]
                 return redirect(reverse("giveaways:join-giveaway", kwargs={"slug": giveaway.slug}))
 
-            cleaned_data.pop("quiz_pre-timer")
-            cleaned_data.pop("csrfmiddlewaretoken")
+            elif admission.status == AdmissionStatus.ADMITTED:
+                messages.success(
+                    self.request,
+                    "You have successfully joined this giveaway. You will contacted via email if selected. Goodluck!",
+                )
 
-            answers = json.loads(redis_quiz_answers)
-            score = calculate_quiz_score(cleaned_data, answers["answers"])
+                #######################################
+                self.request.session.pop(giveaway.slug, None)
+                self.request.session.pop("account_number", None)
+                #######################################
 
-            account_number = self.request.session["account_number"]
+                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
-            ########################################
-            self.request.session.pop(giveaway.slug, None)  #
-            self.request.session.pop("account_number", None)  #
-            self.request.session.pop("questions", None)  #
-            #######################################
+            join_giveaway_form.add_error(
+                None, "You cannot use the same account number multiple times."
+            )
 
-            if score >= 50:
-                participant = get_object_or_404(
-                    giveaway.participants.get_queryset(),
-                    account_number=account_number,
-                )
-                participant.is_eligible = True
-                participant.save()
+        context = self.get_context_data(**kwargs)
+        context["private_giveaway_entry_form"] = private_giveaway_entry_form
+        context["join_giveaway_form"] = join_giveaway_form
 
-                populate_recipient_code.schedule((participant.id), delay=2)
+        return self.render_to_response(context)
 
-                messages.success(
-                    self.request,
-                    "You have successfully joined this giveaway. You will contacted via email if selected. Goodluck!",
-                )
+    def submit_quiz(self, giveaway):
+        """Scores the quiz attempt referenced by the session. Each attempt is scored once."""
+        attempt_id = self.request.session.pop("quiz_attempt", None)
+        attempt = consume_quiz_attempt(attempt_id) if attempt_id else None
 
-                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
+        # The attempt expired, was already submitted or the form was tampered with.
+        if attempt is None or attempt[0]["id"] != self.request.POST.get("quiz_pre-quiz_id"):
+            messages.error(self.request, "Sorry, something went wrong validating quiz answers.")
+            return redirect(reverse("giveaways:join-giveaway", kwargs={"slug": giveaway.slug}))
+
+        questions, answers = attempt
+        quiz_form = self.quiz_form(self.request.POST, prefix="quiz_pre", questions=questions)
+
+        if not quiz_form.is_valid():
+            messages.error(self.request, "Sorry, something went wrong validating quiz answers.")
+            return redirect(reverse("giveaways:join-giveaway", kwargs={"slug": giveaway.slug}))
+
+        score = calculate_quiz_score(quiz_form.cleaned_data, answers)
 
+        account_number = self.request.session["account_number"]
+
+        ########################################
+        self.request.session.pop(giveaway.slug, None)  #
+        self.request.session.pop("account_number", None)  #
+        #######################################
+
+        if score < 50:
+            release_slot(giveaway.pk, account_number, failed=True)
             messages.error(
                 self.request,
-                "Sorry, you did not get up to the required percentage. Try again",
+                "Sorry, you did not get up to the required percentage. Better luck next time!",
             )
             return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
-        context["quiz_form"] = quiz_form
+        admission = admit_reserved_participant(giveaway, account_number)
 
-        context["giveaway"] = giveaway
-        context["private_giveaway_entry_form"] = private_giveaway_entry_form
-        context["join_giveaway_form"] = join_giveaway_form
-        context["title"] = f"Join {giveaway.title}| Giveaway"
+        if admission.status == AdmissionStatus.ADMITTED:
+            messages.success(
+                self.request,
+                "You have successfully joined this giveaway. You will contacted via email if selected. Goodluck!",
+            )
+        elif admission.status == AdmissionStatus.EXPIRED:
+            messages.error(
+                self.request, "Sorry, your reserved slot expired before the quiz was submitted."
+            )
+        elif admission.status == AdmissionStatus.FULL:
+            messages.error(
+                self.request,
+                "The maximum number of participants for this giveaway has been reached. Better luck next time!",
+            )
+        else:
+            messages.error(self.request, "You cannot use the same account number multiple times.")
 
-        return render(self.request, self.template_name, context)
+        return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
     def get_form(self, request, formcls, prefix):
         """Gets the form's POST data based on `request` and `prefix`"""
@@ -292,32 +280,26 @@ class JoinGiveawayView(generic.TemplateView):
 
         # Each form with different params determined using `prefix`
         if prefix == "private_entry_pre":
-            return formcls(data, prefix=prefix, giveaway=self.get_context_data()["giveaway"])
+            return formcls(data, prefix=prefix, giveaway=self.giveaway)
         elif prefix == "join_giveaway_pre":
             return formcls(data, prefix=prefix)
-        elif prefix == "quiz_pre":
-            return formcls(data, prefix=prefix, questions=self.request.session["questions"])
 
 
-class SearchGiveawayView(generic.ListView):
+class SearchGiveawayView(CursorPaginationMixin, generic.ListView):
     template_name = "giveaways/search.html"
     context_object_name = "giveaways"
     model = Giveaway
     paginate_by = 4
+    cursor_ordering = ("-rank", "-id")
 
     def get_queryset(self):
         query = self.request.GET.get("q")
-        queryset = (
-            self.model.objects.search(query)
-            .select_related("monetary_prize", "creator", "quiz_category")
-            .prefetch_related("participants")
-            .filter(is_public=True)
-            .order_by("-created_at")
-        )
+        queryset = self.model.objects.search(query).cards().filter(is_public=True)
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["q"] = self.request.GET.get("q")
+        attach_cache_versions(context["giveaways"])
 
         return context
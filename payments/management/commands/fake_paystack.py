@@ -0,0 +1,163 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    """Answers the Paystack (and opentdb) endpoints the app calls with canned payloads."""
+
+    protocol_version = "HTTP/1.1"
+
+    # Set by the command, see `Command.handle`.
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def respond(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self, method: str) -> None:
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if random.random() < self.error_rate:
+            self.respond(503, {"status": False, "message": "Injected error"})
+            return
+
+        path = urlparse(self.path).path
+        if path == "/api.php":
+            self.respond(200, self.get_quiz_questions())
+            return
+
+        for prefix, route in ROUTES[method]:
+            if path.startswith(prefix):
+                self.respond(200, {"status": True, "message": "OK", "data": route(self, path)})
+                return
+
+        self.respond(404, {"status": False, "message": "Not found"})
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def get_quiz_questions(self):
+        amount = int(parse_qs(urlparse(self.path).query).get("amount", ["4"])[0])
+        return {
+            "response_code": 0,
+            "results": [
+                {
+                    "category": "General Knowledge",
+                    "type": "multiple",
+                    "difficulty": "easy",
+                    "question": f"Fake question {uuid4().hex[:8]}?",
+                    "correct_answer": "Right",
+                    "incorrect_answers": ["Wrong", "Also wrong", "Still wrong"],
+                }
+                for _ in range(amount)
+            ],
+        }
+
+    def initialize_transaction(self, path):
+        reference = self.read_json()["reference"]
+        return {
+            "authorization_url": f"https://checkout.paystack.com/{reference}",
+            "access_code": reference,
+            "reference": reference,
+        }
+
+    def verify(self, path):
+        return {
+            "reference": path.rsplit("/", 1)[-1],
+            "status": "success",
+            "gateway_response": "OK",
+        }
+
+    def resolve_bank_account(self, path):
+        return {"account_number": "0000000000", "account_name": "FAKE ACCOUNT"}
+
+    def create_transfer_recipient(self, path):
+        self.read_json()
+        return {"recipient_code": f"RCP_{uuid4().hex[:16]}"}
+
+    def create_transfer_recipients(self, path):
+        batch = self.read_json()["batch"]
+        return {
+            "success": [
+                {"recipient_code": f"RCP_{uuid4().hex[:16]}", "details": recipient}
+                for recipient in batch
+            ],
+            "errors": [],
+        }
+
+    def initiate_bulk_transfer(self, path):
+        transfers = self.read_json()["transfers"]
+        return [
+            {**transfer, "transfer_code": f"TRF_{uuid4().hex[:16]}", "status": "received"}
+            for transfer in transfers
+        ]
+
+
+ROUTES = {
+    "GET": [
+        ("/transaction/verify/", FakePaystackHandler.verify),
+        ("/transfer/verify/", FakePaystackHandler.verify),
+        ("/bank/resolve", FakePaystackHandler.resolve_bank_account),
+    ],
+    "POST": [
+        ("/transaction/initialize", FakePaystackHandler.initialize_transaction),
+        ("/transferrecipient/bulk", FakePaystackHandler.create_transfer_recipients),
+        ("/transferrecipient", FakePaystackHandler.create_transfer_recipient),
+        ("/transfer/bulk", FakePaystackHandler.initiate_bulk_transfer),
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the Paystack and opentdb APIs with injectable latency and "
+        "errors. Start the app with `PAYSTACK_URL=http://<addr>:<port>` and "
+        "`QUIZ_API_URL=http://<addr>:<port>/api.php` to target it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--addr", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency-ms", type=float, default=50)
+        parser.add_argument("--jitter-ms", type=float, default=25)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        FakePaystackHandler.latency = options["latency_ms"] / 1000
+        FakePaystackHandler.jitter = options["jitter_ms"] / 1000
+        FakePaystackHandler.error_rate = options["error_rate"]
+
+        server = ThreadingHTTPServer((options["addr"], options["port"]), FakePaystackHandler)
+        self.stdout.write(
+            f"Fake Paystack listening on http://{options['addr']}:{options['port']} "
+            f"(latency={options['latency_ms']}ms jitter={options['jitter_ms']}ms "
+            f"error_rate={options['error_rate']})"
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
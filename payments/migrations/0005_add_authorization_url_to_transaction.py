@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2021-10-24 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_update_transaction_status_enum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='authorization_url',
+            field=models.URLField(blank=True, max_length=256, null=True, verbose_name='authorization url'),
+        ),
+    ]
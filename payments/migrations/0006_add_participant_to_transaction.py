@@ -0,0 +1,24 @@
+# Generated by Django 3.2.7 on 2021-10-26 10:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaways', '0012_add_pending_end_index_to_giveaway'),
+        ('payments', '0005_add_authorization_url_to_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='participant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_transactions', to='giveaways.participant'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('participant__isnull', False)), fields=('participant',), name='unique_credit_transaction_per_participant'),
+        ),
+    ]
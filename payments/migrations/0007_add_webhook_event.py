@@ -0,0 +1,28 @@
+# Generated by Django 3.2.7 on 2021-10-26 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_add_participant_to_transaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='key')),
+                ('event', models.CharField(max_length=50, verbose_name='event')),
+                ('payload', models.JSONField(verbose_name='payload')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='processed at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='webhook_event_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.7 on 2021-10-27 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_add_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'updated_at'], name='transaction_status_updated_idx'),
+        ),
+    ]
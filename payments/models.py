@@ -1,6 +1,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from giveaways.models import Giveaway
+from giveaways.models import Giveaway, Participant
 
 from payments.enums import TransactionStatus
 
@@ -14,6 +14,15 @@ class Transaction(models.Model):
         blank=False,
         null=False,
     )
+    # Set on credit transactions only, the winner the transfer pays out to. Cleared when the
+    # transfer failed or was reversed, so that the winner is credited again.
+    participant = models.ForeignKey(
+        Participant,
+        related_name="credit_transactions",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
 
     narration = models.CharField(_("narration"), max_length=100, blank=False, null=False)
     amount = models.DecimalField(
@@ -28,6 +37,44 @@ class Transaction(models.Model):
     gateway_response = models.CharField(
         _("gateway response"), max_length=256, blank=True, null=True
     )
+    # Set on top up transactions only, the checkout link Paystack returned for the reference.
+    authorization_url = models.URLField(
+        _("authorization url"), max_length=256, blank=True, null=True
+    )
 
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="transaction_status_updated_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["participant"],
+                condition=models.Q(participant__isnull=False),
+                name="unique_credit_transaction_per_participant",
+            )
+        ]
+
+
+class WebhookEvent(models.Model):
+    """Inbox of verified Paystack webhook deliveries, applied in batches by `drain_webhook_inbox`."""
+
+    # `event:data.id`, Paystack redelivers the same event under the same key. Events without an
+    # id or reference are keyed by the SHA-256 of their body instead.
+    key = models.CharField(_("key"), max_length=100, unique=True)
+    event = models.CharField(_("event"), max_length=50)
+    payload = models.JSONField(_("payload"))
+
+    processed_at = models.DateTimeField(_("processed at"), blank=True, null=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="webhook_event_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            )
+        ]
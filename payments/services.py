@@ -1,35 +1,267 @@
+import asyncio
 import logging
+import random
+import time
+import weakref
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
+import httpx
 import requests
+from asgiref.sync import sync_to_async
+from core.clients import get_http_session, lazy_redis
+from core.utils import CircuitBreaker, LatencyHistogram, TokenBucket
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
+from giveaways.cache import invalidate_giveaway_cache
 from giveaways.enums import GiveawayStatus
 from giveaways.models import Giveaway
+from redis.exceptions import LockError, RedisError
 from requests.exceptions import RequestException
 
 from .models import Transaction, TransactionStatus
 
 logger = logging.getLogger(__name__)
 
-# TODO: Payout to giveaway winners
+r = lazy_redis()
+
+# Shared by the sync and async clients, so an outage seen by either stops both.
+paystack_breaker = CircuitBreaker(
+    settings.PAYSTACK_FAILURE_THRESHOLD, settings.PAYSTACK_RESET_TIMEOUT
+)
+
+# Shared by every outbound call that provisions transfer recipients in this process.
+recipient_rate_limiter = TokenBucket(
+    settings.PAYSTACK_RATE_LIMIT, settings.PAYSTACK_RATE_LIMIT_BURST
+)
+
 # TODO: Improve error handling
-# TODO: Mark pending transactions over 24 hours as `FAILED`
 # TODO: Delete giveaways.
 # TODO: Incorporate Buycoins.
 
 
+# Paystack's answers for an account number it could not resolve, the only failures cached.
+UNRESOLVED_ACCOUNT_STATUSES = {400, 422}
+
+
+def parse_json(response) -> Optional[dict]:
+    """Returns the JSON body of a `requests` or `httpx` response, or None if it is not JSON."""
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+class PaystackUnavailable(RequestException):
+    """Raised instead of calling Paystack while `paystack_breaker` is open."""
+
+
 class Paystack:
+    """Client for every Paystack call made by the app.
+
+    Calls go through `request` (or `arequest` within async views), which share per-endpoint
+    timeouts, jittered retries of idempotent calls, `paystack_breaker` and latency histograms.
+    Sync calls share the process-wide session of `core.clients`, while each event loop gets an
+    async client with its own keep-alive pool of `PAYSTACK_POOL_MAXSIZE`.
+    """
+
     headers = {
         "authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
     }
 
     def __init__(self):
-        self.requests = requests.Session()
+        self.async_requests = weakref.WeakKeyDictionary()
+        self.latency = defaultdict(LatencyHistogram)
 
     def generate_txn_ref(self):
         return uuid4().hex
 
+    def get_async_requests(self) -> httpx.AsyncClient:
+        # One client per event loop, as its connections cannot outlive the loop they were opened
+        # on and `async_to_sync` runs every call on a new loop.
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_requests:
+            self.async_requests[loop] = httpx.AsyncClient(
+                base_url=settings.PAYSTACK_URL,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=settings.PAYSTACK_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.PAYSTACK_POOL_MAXSIZE,
+                ),
+            )
+        return self.async_requests[loop]
+
+    def get_timeout(self, endpoint: str) -> float:
+        return settings.PAYSTACK_TIMEOUTS.get(endpoint, settings.PAYSTACK_TIMEOUT)
+
+    def get_retry_delay(self, attempt: int) -> float:
+        # Full jitter, so that clients retrying the same outage do not do so in lockstep.
+        return random.uniform(0, settings.PAYSTACK_RETRY_BACKOFF * 2**attempt)
+
+    def get_latency_stats(self) -> Dict[str, dict]:
+        return {endpoint: histogram.snapshot() for endpoint, histogram in self.latency.items()}
+
+    def should_retry(self, status_code: int) -> bool:
+        return status_code == 429 or status_code >= 500
+
+    def record_outcome(self, status_code: Optional[int]) -> None:
+        # Rate limiting is not an outage, it neither opens nor closes the breaker.
+        if status_code is None or status_code >= 500:
+            paystack_breaker.record_failure()
+        elif status_code != 429:
+            paystack_breaker.record_success()
+
+    def request(
+        self, method: str, path: str, endpoint: str = None, idempotent: bool = None, **kwargs
+    ) -> requests.Response:
+        """Calls Paystack, retrying idempotent calls on connection errors, 429s and 5xxs.
+
+        `endpoint` names the call for timeouts and latency stats when `path` holds references.
+        Calls are idempotent by default only for GET requests.
+        """
+        endpoint = endpoint or path
+        attempts = 1 + settings.PAYSTACK_MAX_RETRIES if (idempotent or method == "GET") else 1
+
+        for attempt in range(attempts):
+            if not paystack_breaker.allow_request():
+                raise PaystackUnavailable(f"Paystack circuit is open -> {method} {endpoint}")
+
+            response = None
+            started_at = time.perf_counter()
+            try:
+                # The session is shared with other APIs, so the secret key goes per request.
+                response = get_http_session().request(
+                    method,
+                    f"{settings.PAYSTACK_URL}{path}",
+                    headers=self.headers,
+                    timeout=self.get_timeout(endpoint),
+                    **kwargs,
+                )
+            except RequestException:
+                if attempt == attempts - 1:
+                    self.record_outcome(None)
+                    raise
+            finally:
+                self.latency[f"{method} {endpoint}"].observe(time.perf_counter() - started_at)
+
+            if response is not None:
+                if not self.should_retry(response.status_code) or attempt == attempts - 1:
+                    self.record_outcome(response.status_code)
+                    return response
+
+            time.sleep(self.get_retry_delay(attempt))
+
+    async def arequest(
+        self, method: str, path: str, endpoint: str = None, idempotent: bool = None, **kwargs
+    ) -> httpx.Response:
+        """Async variant of `request`, raising `httpx.HTTPError` on connection errors."""
+        endpoint = endpoint or path
+        attempts = 1 + settings.PAYSTACK_MAX_RETRIES if (idempotent or method == "GET") else 1
+
+        for attempt in range(attempts):
+            if not paystack_breaker.allow_request():
+                raise PaystackUnavailable(f"Paystack circuit is open -> {method} {endpoint}")
+
+            response = None
+            started_at = time.perf_counter()
+            try:
+                response = await self.get_async_requests().request(
+                    method, path, timeout=self.get_timeout(endpoint), **kwargs
+                )
+            except httpx.HTTPError:
+                if attempt == attempts - 1:
+                    self.record_outcome(None)
+                    raise
+            finally:
+                self.latency[f"{method} {endpoint}"].observe(time.perf_counter() - started_at)
+
+            if response is not None:
+                if not self.should_retry(response.status_code) or attempt == attempts - 1:
+                    self.record_outcome(response.status_code)
+                    return response
+
+            await asyncio.sleep(self.get_retry_delay(attempt))
+
+    def get_bank_account_cache_key(self, nuban: str, bank_code: str) -> str:
+        return f"nuban:{bank_code}:{nuban}"
+
+    def get_cached_bank_account(self, nuban: str, bank_code: str) -> Optional[Tuple[bool, str]]:
+        try:
+            account_name = r.get(self.get_bank_account_cache_key(nuban, bank_code))
+        except RedisError as err:
+            logger.warning(f"Unable to read cached account name -> {err}")
+            return None
+
+        if account_name is None:
+            return None
+
+        # An empty value is a cached "account does not exist" answer.
+        return (True, account_name.decode()) if account_name else (False, "")
+
+    def cache_bank_account(
+        self, nuban: str, bank_code: str, status_code: int, response_data: Optional[dict]
+    ) -> Tuple[bool, str]:
+        """Caches Paystack's answer for an account number when it is a definitive one.
+
+        Only a resolved account or Paystack's "could not resolve" answer is cached. Rate limits,
+        auth errors, outages and unreadable bodies are not, so they never lock joiners out.
+        """
+        data = (response_data or {}).get("data") or {}
+
+        if status_code == 200 and data.get("account_name"):
+            result, ttl = (True, data["account_name"]), settings.NUBAN_CACHE_TTL
+        elif status_code in UNRESOLVED_ACCOUNT_STATUSES:
+            result, ttl = (False, ""), settings.NUBAN_NEGATIVE_CACHE_TTL
+        else:
+            logger.warning(f"Unable to resolve account number -> {status_code}")
+            return False, ""
+
+        try:
+            r.set(self.get_bank_account_cache_key(nuban, bank_code), result[1], ex=ttl)
+        except RedisError as err:
+            logger.warning(f"Unable to cache account name -> {err}")
+
+        return result
+
+    def resolve_bank_account(self, nuban: str, bank_code: str) -> Tuple[bool, str]:
+        """Resolves an account number to its account name, going to Paystack on cache misses."""
+        cached = self.get_cached_bank_account(nuban, bank_code)
+        if cached is not None:
+            return cached
+
+        params = {"account_number": nuban, "bank_code": bank_code}
+        try:
+            response = self.request("GET", "/bank/resolve", params=params)
+        except RequestException as err:
+            logger.exception(err)
+            return False, ""
+
+        return self.cache_bank_account(
+            nuban, bank_code, response.status_code, parse_json(response)
+        )
+
+    async def aresolve_bank_account(self, nuban: str, bank_code: str) -> Tuple[bool, str]:
+        """Async variant of `resolve_bank_account` for use within async views."""
+        cached = await sync_to_async(self.get_cached_bank_account, thread_sensitive=False)(
+            nuban, bank_code
+        )
+        if cached is not None:
+            return cached
+
+        params = {"account_number": nuban, "bank_code": bank_code}
+        try:
+            response = await self.arequest("GET", "/bank/resolve", params=params)
+        except (httpx.HTTPError, PaystackUnavailable) as err:
+            logger.exception(err)
+            return False, ""
+
+        return await sync_to_async(self.cache_bank_account, thread_sensitive=False)(
+            nuban, bank_code, response.status_code, parse_json(response)
+        )
+
     @transaction.atomic()
     def create_new_transaction(self, giveaway):
         authorization_url, reference = self.initialize_transaction(giveaway)
@@ -40,38 +272,174 @@ class Paystack:
                 giveaway=giveaway,
                 narration=f"top_up_{reference}",
                 amount=giveaway.monetary_prize.amount,
+                authorization_url=authorization_url,
             )
+            invalidate_giveaway_cache(giveaway.pk)
 
         return authorization_url
 
+    def get_pending_topup(self, giveaway) -> Optional[Transaction]:
+        """Returns the giveaway's last INITIATED top up whose link has not expired yet."""
+        return (
+            Transaction.objects.filter(
+                giveaway=giveaway,
+                narration__startswith="top_up_",
+                status=TransactionStatus.INITIATED,
+                authorization_url__isnull=False,
+                created_at__gt=timezone.now()
+                - timedelta(seconds=settings.PAYSTACK_TOPUP_LINK_TTL),
+            )
+            .order_by("-created_at")
+            .first()
+        )
+
+    def get_topup_cache_key(self, giveaway_id: int) -> str:
+        return f"topup:{giveaway_id}"
+
+    def get_cached_topup_url(self, giveaway) -> Optional[str]:
+        """Returns the giveaway's live top up link, if any, without calling Paystack."""
+        authorization_url = r.get(self.get_topup_cache_key(giveaway.pk))
+        return authorization_url.decode() if authorization_url else None
+
+    def get_or_create_topup_url(self, giveaway) -> Optional[str]:
+        """Returns the giveaway's live top up link, initializing a transaction only when there is none.
+
+        The link of the last INITIATED transaction is reused until `PAYSTACK_TOPUP_LINK_TTL`
+        elapses, so repeated clicks do not leave a trail of orphan transactions behind. Redis
+        only caches that link: the transaction itself is looked up before initializing a new one.
+        """
+        authorization_url = self.get_cached_topup_url(giveaway)
+        if authorization_url:
+            return authorization_url
+
+        key = self.get_topup_cache_key(giveaway.pk)
+        try:
+            # Serialises double clicks and the background task on a single initialization.
+            with r.lock(
+                f"{key}:lock",
+                timeout=settings.PAYSTACK_TIMEOUT * 2,
+                blocking_timeout=settings.PAYSTACK_TIMEOUT,
+            ):
+                authorization_url = self.get_cached_topup_url(giveaway)
+                if authorization_url:
+                    return authorization_url
+
+                pending_topup = self.get_pending_topup(giveaway)
+                if pending_topup:
+                    expires_at = pending_topup.created_at + timedelta(
+                        seconds=settings.PAYSTACK_TOPUP_LINK_TTL
+                    )
+                    r.set(
+                        key,
+                        pending_topup.authorization_url,
+                        ex=max(1, int((expires_at - timezone.now()).total_seconds())),
+                    )
+                    return pending_topup.authorization_url
+
+                authorization_url = self.create_new_transaction(giveaway)
+                if authorization_url:
+                    r.set(key, authorization_url, ex=settings.PAYSTACK_TOPUP_LINK_TTL)
+        except LockError:
+            pending_topup = self.get_pending_topup(giveaway)
+            return self.get_cached_topup_url(giveaway) or (
+                pending_topup.authorization_url if pending_topup else None
+            )
+
+        return authorization_url
+
+    def clear_topup_url(self, giveaway_id: int) -> None:
+        r.delete(self.get_topup_cache_key(giveaway_id))
+
     def verify_transaction(self, reference):
-        response = self.requests.get(f"{settings.PAYSTACK_URL}/transaction/verify/{reference}")
+        response = self.request(
+            "GET", f"/transaction/verify/{reference}", endpoint="/transaction/verify"
+        )
         payload = response.json()
 
         status, message, giveaway = self.validate_transaction_payload(payload, reference)
         return status, message, giveaway
 
-    def initiate_bulk_transfer(self, payload):
+    def fetch_transaction_status(self, txn) -> Optional[str]:
+        """Returns Paystack's status for a top up or credit transaction, None when unknown."""
+        if txn.narration.startswith("top_up_"):
+            endpoint = "/transaction/verify"
+        else:
+            endpoint = "/transfer/verify"
+
+        try:
+            response = self.request("GET", f"{endpoint}/{txn.id.hex}", endpoint=endpoint)
+        except RequestException as err:
+            logger.exception(err)
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        return response.json()["data"]["status"]
+
+    def initiate_bulk_transfer(self, payload) -> Optional[dict]:
         try:
-            response = self.requests.post(f"{settings.PAYSTACK_URL}/transfer/bulk", json=payload)
-            if response.status_code == 200:
-                return response.json()
+            # Not retried, a timed out call may still have queued the transfers. They stay
+            # INITIATED until `reconcile_transactions` finds them on `/transfer/verify`, and
+            # Paystack refuses the references it has already seen on the next payout run.
+            response = self.request("POST", "/transfer/bulk", json=payload)
         except RequestException as err:
             logger.exception(err)
-            raise err
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"Unable to initiate bulk transfer -> {response.status_code}")
+            return None
+
+        return response.json()
+
+    def create_transfer_recipient_payload(self, participant) -> dict:
+        return {
+            "type": "nuban",
+            "name": participant.name,
+            "account_number": participant.account_number,
+            "bank_code": participant.bank_code,
+            "currency": "NGN",
+        }
 
     def create_transfer_recipient(self, payload):
+        recipient_rate_limiter.acquire()
         try:
-            response = self.requests.post(
-                f"{settings.PAYSTACK_URL}/transferrecipient", json=payload
-            )
-            if response.status_code == 200:
+            response = self.request("POST", "/transferrecipient", json=payload)
+            if response.status_code in (200, 201):
                 response = response.json()
-                return response["recipient_code"]
+                return response["data"]["recipient_code"]
         except RequestException as err:
             logger.exception(err)
             return None
 
+    def create_transfer_recipients(
+        self, batch: List[dict]
+    ) -> Optional[Dict[Tuple[str, str], str]]:
+        """Creates recipients with a single `/transferrecipient/bulk` call.
+
+        Returns the recipient codes keyed by `(account_number, bank_code)`, leaving out entries
+        Paystack rejected, or None when the call itself failed.
+        """
+        recipient_rate_limiter.acquire()
+        try:
+            response = self.request("POST", "/transferrecipient/bulk", json={"batch": batch})
+        except RequestException as err:
+            logger.exception(err)
+            return None
+
+        if response.status_code not in (200, 201):
+            logger.warning(f"Unable to create transfer recipients -> {response.status_code}")
+            return None
+
+        recipient_codes = {}
+        for recipient in response.json()["data"]["success"]:
+            details = recipient["details"]
+            key = (details["account_number"], details["bank_code"])
+            recipient_codes[key] = recipient["recipient_code"]
+
+        return recipient_codes
+
     def create_transaction_payload(self, amount, email, reference):
         return {
             "reference": reference,
@@ -91,9 +459,7 @@ class Paystack:
             txn_ref,
         )
         try:
-            response = self.requests.post(
-                f"{settings.PAYSTACK_URL}/transaction/initialize", json=payload
-            )
+            response = self.request("POST", "/transaction/initialize", json=payload)
 
             return (
                 (response.json()["data"]["authorization_url"], txn_ref)
@@ -113,6 +479,8 @@ class Paystack:
                     txn.status = TransactionStatus.FAILED
                     txn.gateway_response = payload["data"]["gateway_response"]
                     txn.save()
+                    invalidate_giveaway_cache(txn.giveaway_id)
+                    self.clear_topup_url(txn.giveaway_id)
 
                     return (False, "Your top up failed!", None)
                 except Transaction.DoesNotExist:
@@ -124,16 +492,23 @@ class Paystack:
                     txn = Transaction.objects.select_related("giveaway").get(id=reference)
                     # use webhook during live & staging
                     if settings.DEBUG:
+                        from giveaways.tasks import schedule_giveaway_expiry
+
                         txn.status = TransactionStatus.SUCCESS
                         txn.giveaway.status = GiveawayStatus.ACTIVE
                         txn.gateway_response = payload["data"]["gateway_response"]
 
-                        txn.giveaway.save()
+                        txn.giveaway.save(update_fields=["status"])
                         txn.save()
+                        invalidate_giveaway_cache(txn.giveaway_id)
+                        self.clear_topup_url(txn.giveaway_id)
+                        schedule_giveaway_expiry(txn.giveaway)
                         return (True, "Giveaway topup was successful!", txn.giveaway)
                     else:
                         txn.status = TransactionStatus.PENDING
                         txn.save()
+                        invalidate_giveaway_cache(txn.giveaway_id)
+                        self.clear_topup_url(txn.giveaway_id)
 
                         return (
                             True,
@@ -145,25 +520,20 @@ class Paystack:
                     return (False, "Transaction not found!", None)
         return (False, "", None)
 
-    def create_bulk_transfers_payload(self, recipients, amount, giveaway):
-        transfers = []
+    def create_bulk_transfers_payload(self, transactions) -> dict:
+        """Builds a `/transfer/bulk` payload paying each credit transaction to its participant.
 
-        for recipient in recipients:
-            new_txn = Transaction.objects.create(
-                id=self.generate_txn_ref(),
-                giveaway=giveaway,
-                narration=f"credit_{recipient}",
-                amount=amount,
-                status=TransactionStatus.INITIATED,
-            )
-            amount_in_kobo = format(amount * 100, ".3f")
-            transfers.append(
-                {
-                    "reference": new_txn.id,
-                    "recipient": recipient,
-                    "amount": amount_in_kobo,
-                }
-            )
+        Transaction ids double as transfer references, which Paystack refuses to reuse, so
+        sending the same transactions again after a crash cannot pay a winner twice.
+        """
+        transfers = [
+            {
+                "reference": txn.id.hex,
+                "recipient": txn.participant.recipient_code,
+                "amount": int(txn.amount * 100),
+            }
+            for txn in transactions
+        ]
         return {"source": "balance", "currency": "NGN", "transfers": transfers}
 
 
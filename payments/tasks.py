@@ -1,73 +1,456 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
 from logging import getLogger
+from typing import List, Optional
+from uuid import UUID, uuid4
 
+from core.queues import TaskPriority, db_periodic_task, db_task, lock_task
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from giveaways.cache import invalidate_giveaway_cache
 from giveaways.enums import GiveawayStatus
 from giveaways.models import Giveaway, Participant
+from giveaways.tasks import schedule_giveaway_expiry
 from huey import crontab
-from huey.contrib.djhuey import db_periodic_task, db_task
 
 from .enums import TransactionStatus
-from .models import Transaction
-from .services import paystack
+from .models import Transaction, WebhookEvent
+from .services import paystack, paystack_breaker, r
 
 logger = getLogger("huey")
 
 
-@db_task()
-def handle_webhook(payload: dict):
-    logger.info(f"Handling webhook of event -> {payload['event']}")
+WEBHOOK_DRAIN_FLAG = "webhook:drain:scheduled"
 
-    if payload["event"] == "charge.success":
-        transaction_ref = payload["data"]["reference"]
+TRANSFER_EVENT_STATUSES = {
+    "transfer.success": TransactionStatus.SUCCESS,
+    "transfer.failed": TransactionStatus.FAILED,
+    "transfer.reversed": TransactionStatus.REVERSED,
+}
+
+
+def schedule_webhook_drain():
+    """Enqueues `drain_webhook_inbox` unless a drain is already queued, so bursts share a drain."""
+    if r.set(WEBHOOK_DRAIN_FLAG, 1, nx=True, ex=60):
+        drain_webhook_inbox.schedule(delay=1)
+
+
+def get_transaction_ids(events) -> List[UUID]:
+    transaction_ids = []
+    for event in events:
         try:
-            transaction = Transaction.objects.select_related("giveaway").get(id=transaction_ref)
-            transaction.status = TransactionStatus.SUCCESS
-            transaction.giveaway.status = GiveawayStatus.ACTIVE
-
-            transaction.giveaway.save()
-            transaction.save()
-        except Transaction.DoesNotExist:
-            logger.error(f"Unable to find transaction with ID -> {transaction_ref}")
-
-
-@db_task()
-def populate_recipient_code(participant_id):
-    participant = Participant.objects.get(pk=participant_id)
-    payload = {
-        "type": "nuban",
-        "name": participant.name,
-        "account_number": participant.account_number,
-        "bank_code": participant.bank_code,
-    }
-    recipient_code = paystack.create_transfer_recipient(payload)
-    if recipient_code:
-        participant.recipient_code = recipient_code
-        participant.save()
-
-
-@db_periodic_task(crontab(hour="*/1"))
+            transaction_ids.append(UUID(event.payload["data"]["reference"]))
+        except (KeyError, TypeError, ValueError):
+            logger.error(f"Webhook event with ID -> {event.pk} has no valid reference")
+
+    return transaction_ids
+
+
+def complete_top_ups(transaction_ids):
+    """Marks top ups as successful and activates the giveaways they paid for."""
+    giveaway_ids = set(
+        Transaction.objects.filter(id__in=transaction_ids)
+        .exclude(status=TransactionStatus.SUCCESS)
+        .values_list("giveaway_id", flat=True)
+    )
+    Transaction.objects.filter(id__in=transaction_ids).update(status=TransactionStatus.SUCCESS)
+
+    activated = list(
+        Giveaway.objects.select_for_update()
+        .filter(pk__in=giveaway_ids, status=GiveawayStatus.CREATED)
+        .only("pk", "end_at")
+    )
+    Giveaway.objects.filter(pk__in=[giveaway.pk for giveaway in activated]).update(
+        status=GiveawayStatus.ACTIVE
+    )
+
+    for giveaway in activated:
+        paystack.clear_topup_url(giveaway.pk)
+        schedule_giveaway_expiry(giveaway)
+    invalidate_giveaway_cache(*giveaway_ids)
+
+
+def mark_paid_giveaways(giveaway_ids) -> None:
+    unpaid_winners = Participant.objects.filter(
+        giveaway=OuterRef("pk"), is_winner=True, is_paid=False
+    )
+    Giveaway.objects.filter(~Exists(unpaid_winners), pk__in=giveaway_ids).update(paid_winners=True)
+
+
+def complete_credits(transaction_ids) -> None:
+    """Marks the winners of successful credit transfers paid, and their giveaways once all are."""
+    credits = Transaction.objects.filter(id__in=transaction_ids, participant__isnull=False)
+    giveaway_ids = set(credits.values_list("giveaway_id", flat=True))
+
+    Participant.objects.filter(pk__in=credits.values("participant_id")).update(is_paid=True)
+    mark_paid_giveaways(giveaway_ids)
+    invalidate_giveaway_cache(*giveaway_ids)
+
+
+def retry_failed_credits(transaction_ids) -> None:
+    """Hands the winners of failed or reversed credit transfers back to `pay_giveaway_winners`.
+
+    The transactions are detached from their winners and kept on record, so the next run
+    credits the winners again under a new reference.
+    """
+    credits = Transaction.objects.filter(id__in=transaction_ids, participant__isnull=False)
+    participant_ids = list(credits.values_list("participant_id", flat=True))
+    giveaway_ids = set(credits.values_list("giveaway_id", flat=True))
+    if not participant_ids:
+        return
+
+    credits.update(participant=None)
+    Participant.objects.filter(pk__in=participant_ids).update(is_paid=False)
+    Giveaway.objects.filter(pk__in=giveaway_ids).update(paid_winners=False)
+    invalidate_giveaway_cache(*giveaway_ids)
+
+
+def update_transaction_status(transaction_ids, status, **fields):
+    giveaway_ids = set(
+        Transaction.objects.filter(id__in=transaction_ids).values_list("giveaway_id", flat=True)
+    )
+    Transaction.objects.filter(id__in=transaction_ids).update(status=status, **fields)
+    invalidate_giveaway_cache(*giveaway_ids)
+
+
+@db_task("payments", priority=TaskPriority.HIGH)
+def drain_webhook_inbox():
+    r.delete(WEBHOOK_DRAIN_FLAG)
+
+    while True:
+        with db_transaction.atomic():
+            # SKIP LOCKED lets the periodic backstop and a scheduled drain run side by side.
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True)
+                .order_by("id")[: settings.WEBHOOK_BATCH_SIZE]
+            )
+            if not events:
+                return
+
+            events_by_type = defaultdict(list)
+            for event in events:
+                events_by_type[event.event].append(event)
+
+            complete_top_ups(get_transaction_ids(events_by_type.pop("charge.success", [])))
+            for event_type, status in TRANSFER_EVENT_STATUSES.items():
+                transaction_ids = get_transaction_ids(events_by_type.pop(event_type, []))
+                update_transaction_status(transaction_ids, status)
+
+                if status == TransactionStatus.SUCCESS:
+                    complete_credits(transaction_ids)
+                else:
+                    retry_failed_credits(transaction_ids)
+
+            for event_type, unhandled in events_by_type.items():
+                logger.info(f"Skipping {len(unhandled)} webhook event(s) of type -> {event_type}")
+
+            WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                processed_at=timezone.now()
+            )
+            logger.info(f"Applied {len(events)} webhook event(s)")
+
+
+@db_periodic_task("payments", crontab(minute="*/5"), priority=TaskPriority.HIGH)
+def drain_webhook_inbox_backstop():
+    drain_webhook_inbox.call_local()
+
+
+def fetch_transaction_statuses(transactions) -> List[Optional[str]]:
+    """Verifies transactions against Paystack concurrently over the pooled session."""
+    with ThreadPoolExecutor(max_workers=settings.PAYSTACK_POOL_MAXSIZE) as executor:
+        return list(executor.map(paystack.fetch_transaction_status, transactions))
+
+
+@db_periodic_task("payments", crontab(minute="*/5"))
+@lock_task("payments", "reconcile-transactions")
+def reconcile_transactions():
+    """Settles INITIATED/PENDING transactions whose webhook never arrived."""
+    now = timezone.now()
+    expire_before = now - timedelta(seconds=settings.TRANSACTION_EXPIRE_AFTER)
+
+    # Served by `transaction_status_updated_idx`, oldest first so every stale row gets its turn.
+    transactions = list(
+        Transaction.objects.filter(
+            status__in=[TransactionStatus.INITIATED, TransactionStatus.PENDING],
+            updated_at__lt=now - timedelta(seconds=settings.TRANSACTION_RECONCILE_AFTER),
+        )
+        .only("id", "narration", "giveaway_id", "created_at")
+        .order_by("updated_at")[: settings.TRANSACTION_RECONCILE_BATCH_SIZE]
+    )
+    if not transactions:
+        return
+
+    outcomes = defaultdict(list)
+    for txn, status in zip(transactions, fetch_transaction_statuses(transactions)):
+        if status == "success":
+            outcome = "recovered"
+        elif status in ("failed", "reversed"):
+            outcome = status
+        elif txn.created_at < expire_before and txn.narration.startswith("top_up_"):
+            outcome = "expired"
+        else:
+            outcome = "unsettled"
+        outcomes[outcome].append(txn)
+
+    with db_transaction.atomic():
+        top_ups = [txn.id for txn in outcomes["recovered"] if txn.narration.startswith("top_up_")]
+        complete_top_ups(top_ups)
+        credits = [txn.id for txn in outcomes["recovered"] if txn.id not in top_ups]
+        update_transaction_status(credits, TransactionStatus.SUCCESS)
+        complete_credits(credits)
+
+        failed = [txn.id for txn in outcomes["failed"]]
+        update_transaction_status(failed, TransactionStatus.FAILED)
+        reversals = [txn.id for txn in outcomes["reversed"]]
+        update_transaction_status(reversals, TransactionStatus.REVERSED)
+        retry_failed_credits(failed + reversals)
+        update_transaction_status(
+            [txn.id for txn in outcomes["expired"]],
+            TransactionStatus.FAILED,
+            gateway_response="Expired",
+        )
+
+        # Abandoned checkouts can still be paid from their link, they are left to expire instead.
+        # Credits never expire: those Paystack has no record of were never sent, and stay
+        # INITIATED for `pay_giveaway_winners` to send again.
+        # Moves the rest to the back of the queue until they settle or expire.
+        Transaction.objects.filter(pk__in=[txn.id for txn in outcomes["unsettled"]]).update(
+            updated_at=now
+        )
+
+    logger.info(
+        "Reconciled {} transaction(s) -> recovered={} failed={} reversed={} expired={} "
+        "unsettled={}".format(
+            len(transactions),
+            len(outcomes["recovered"]),
+            len(outcomes["failed"]),
+            len(outcomes["reversed"]),
+            len(outcomes["expired"]),
+            len(outcomes["unsettled"]),
+        )
+    )
+
+
+@db_task("payments")
+def prepare_topup_url(giveaway_id: int):
+    """Initializes the top up link of a new giveaway ahead of the creator's first visit."""
+    giveaway = Giveaway.objects.select_related("monetary_prize", "creator").get(pk=giveaway_id)
+
+    if giveaway.status == GiveawayStatus.CREATED:
+        paystack.get_or_create_topup_url(giveaway)
+
+
+def populate_recipient_code_batch(participants) -> Optional[int]:
+    """Creates the transfer recipients of `participants`, returning how many were created.
+
+    Returns None when the bulk call itself failed. Participants Paystack rejected are retried
+    with an exponential backoff, up to `PAYSTACK_RECIPIENT_MAX_ATTEMPTS` times.
+    """
+    payloads = [
+        paystack.create_transfer_recipient_payload(participant) for participant in participants
+    ]
+    recipient_codes = paystack.create_transfer_recipients(payloads)
+    if recipient_codes is None:
+        return None
+
+    rejected = []
+    for participant, payload in zip(participants, payloads):
+        key = (participant.account_number, participant.bank_code)
+        participant.recipient_code = recipient_codes.get(key)
+        if participant.recipient_code:
+            continue
+
+        # Entries rejected within the batch are retried on their own, unless Paystack went down
+        # meanwhile, in which case they are left for the next run without using up an attempt.
+        if paystack_breaker.is_open:
+            continue
+
+        participant.recipient_code = paystack.create_transfer_recipient(payload)
+        if participant.recipient_code is None:
+            rejected.append(participant)
+
+    now = timezone.now()
+    for participant in rejected:
+        participant.recipient_attempts += 1
+        participant.recipient_retry_at = now + timedelta(
+            seconds=settings.PAYSTACK_RECIPIENT_RETRY_BACKOFF
+            * 2 ** (participant.recipient_attempts - 1)
+        )
+
+    abandoned = [
+        participant.pk
+        for participant in rejected
+        if participant.recipient_attempts >= settings.PAYSTACK_RECIPIENT_MAX_ATTEMPTS
+    ]
+    if abandoned:
+        logger.error(f"Gave up on creating transfer recipients for participants -> {abandoned}")
+
+    provisioned = [participant for participant in participants if participant.recipient_code]
+    Participant.objects.bulk_update(
+        provisioned + rejected, ["recipient_code", "recipient_attempts", "recipient_retry_at"]
+    )
+
+    return len(provisioned)
+
+
+@db_periodic_task("maintenance", crontab(minute="*"), priority=TaskPriority.LOW)
+@lock_task("maintenance", "populate-recipient-codes")
+def populate_recipient_codes():
+    pending = (
+        Participant.objects.filter(
+            Q(recipient_retry_at__isnull=True) | Q(recipient_retry_at__lte=timezone.now()),
+            recipient_code__isnull=True,
+            recipient_attempts__lt=settings.PAYSTACK_RECIPIENT_MAX_ATTEMPTS,
+            is_eligible=True,
+            giveaway__paid_winners=False,
+        )
+        .only("pk", "name", "account_number", "bank_code", "recipient_attempts")
+        .order_by("pk")
+    )
+
+    provisioned = 0
+    last_pk = 0
+    while not paystack_breaker.is_open:
+        # Keyset pagination, participants that still failed would otherwise be fetched again.
+        participants = list(
+            pending.filter(pk__gt=last_pk)[: settings.PAYSTACK_RECIPIENT_BATCH_SIZE]
+        )
+        if not participants:
+            break
+
+        created = populate_recipient_code_batch(participants)
+        if created is None:
+            # Paystack is unreachable, the remaining batches are picked up on the next run.
+            break
+
+        provisioned += created
+        last_pk = participants[-1].pk
+
+    if paystack_breaker.is_open:
+        logger.warning("Paystack is unavailable, stopped creating transfer recipients")
+
+    if provisioned:
+        logger.info(f"Created {provisioned} transfer recipients")
+
+
+def get_winner_prize(giveaway) -> Decimal:
+    # Matches the draw, which makes every eligible participant a winner when there are fewer.
+    number_of_winners = min(giveaway.number_of_winners, giveaway.eligible_count)
+    return (giveaway.monetary_prize.net_amount / number_of_winners).quantize(
+        Decimal(".01"), rounding=ROUND_DOWN
+    )
+
+
+def reconcile_bulk_transfer(transactions, transfer_response) -> None:
+    """Records the outcome of a `/transfer/bulk` call against its credit transactions."""
+    transfers = {transfer["reference"]: transfer for transfer in transfer_response["data"]}
+
+    reconciled = []
+    for txn in transactions:
+        transfer = transfers.get(txn.id.hex)
+        # Transfers missing from the response stay INITIATED and are sent again next run.
+        if transfer is None:
+            continue
+
+        txn.gateway_response = transfer.get("transfer_code")
+        if transfer["status"] == "failed":
+            logger.warning(f"Transfer failed for transaction with ID -> {txn.id}")
+            txn.status = TransactionStatus.FAILED
+        elif transfer["status"] == "success":
+            txn.status = TransactionStatus.SUCCESS
+        else:
+            # Queued or received, the winner is paid once the transfer webhook or
+            # `reconcile_transactions` confirms it.
+            txn.status = TransactionStatus.PENDING
+        reconciled.append(txn)
+
+    with db_transaction.atomic():
+        Transaction.objects.bulk_update(reconciled, ["status", "gateway_response"])
+        complete_credits([txn.id for txn in reconciled if txn.status == TransactionStatus.SUCCESS])
+        retry_failed_credits(
+            [txn.id for txn in reconciled if txn.status == TransactionStatus.FAILED]
+        )
+
+
+def pay_giveaway_winners(giveaway) -> None:
+    winners = list(
+        giveaway.participants.filter(is_winner=True, is_paid=False).only(
+            "pk", "recipient_code", "recipient_attempts"
+        )
+    )
+
+    # Winners without a recipient code are paid on a later run, once `populate_recipient_codes`
+    # created one, unless it gave up on them.
+    unprovisioned = [winner for winner in winners if winner.recipient_code is None]
+    abandoned = [
+        winner.pk
+        for winner in unprovisioned
+        if winner.recipient_attempts >= settings.PAYSTACK_RECIPIENT_MAX_ATTEMPTS
+    ]
+    if abandoned:
+        logger.error(
+            f"Unable to pay winners of giveaway -> {giveaway.pk} without a transfer recipient, "
+            f"participants -> {abandoned}"
+        )
+    if len(unprovisioned) > len(abandoned):
+        logger.info(f"Waiting on recipient codes to pay winners of giveaway -> {giveaway.pk}")
+
+    winners = [winner for winner in winners if winner.recipient_code]
+    if not winners:
+        return
+
+    amount = get_winner_prize(giveaway)
+    # Winners credited by an earlier run keep their transaction, and thereby its reference,
+    # unless that transfer failed and `retry_failed_credits` detached it.
+    Transaction.objects.bulk_create(
+        [
+            Transaction(
+                id=uuid4(),
+                giveaway=giveaway,
+                participant=winner,
+                narration=f"credit_{winner.recipient_code}",
+                amount=amount,
+            )
+            for winner in winners
+        ],
+        ignore_conflicts=True,
+    )
+
+    transactions = list(
+        Transaction.objects.select_related("participant")
+        .filter(participant__in=winners, status=TransactionStatus.INITIATED)
+        .order_by("created_at")
+    )
+    for start in range(0, len(transactions), settings.PAYSTACK_BULK_TRANSFER_LIMIT):
+        chunk = transactions[start : start + settings.PAYSTACK_BULK_TRANSFER_LIMIT]
+
+        transfer_response = paystack.initiate_bulk_transfer(
+            paystack.create_bulk_transfers_payload(chunk)
+        )
+        if transfer_response is None:
+            continue
+
+        reconcile_bulk_transfer(chunk, transfer_response)
+
+    mark_paid_giveaways([giveaway.pk])
+    invalidate_giveaway_cache(giveaway.pk)
+
+
+@db_periodic_task("payments", crontab(minute="0", hour="*/1"), priority=TaskPriority.HIGH)
+@lock_task("payments", "credit-giveaway-winners")
 def credit_giveaway_winners():
     logger.info("Trying to credit giveaway winners...")
 
-    ended_giveaways = (
-        Giveaway.objects.prefetch_related("participants")
-        .filter(
-            has_winners=True,
-            paid_winners=False,
-            status=GiveawayStatus.ENDED,
-        )
-        .all()
+    ended_giveaways = Giveaway.objects.select_related("monetary_prize").filter(
+        has_winners=True,
+        paid_winners=False,
+        status=GiveawayStatus.ENDED,
     )
 
     for giveaway in ended_giveaways:
-        winners = list(
-            giveaway.participants.filter(is_winner=True, is_paid=False)
-            .all()
-            .values("recipient_code", "email")
-        )
-        winners_count = giveaway.participants.filter(is_winner=True).count()
-        amount_to_be_paid = giveaway.monetary_prize.net_amount / winners_count
-        # rddhdniksn
-        payload = paystack.create_bulk_transfers_payload(winners, amount_to_be_paid, giveaway)
-        transfer_response = paystack.initiate_bulk_transfer(payload)
-        for transfer in transfer_response["data"]:
-            txn = Transaction.objects.filter()
+        pay_giveaway_winners(giveaway)
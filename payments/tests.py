@@ -1,3 +1,176 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from core.queues import TaskPriority, get_queue
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from giveaways.models import Participant
+
+from .models import WebhookEvent
+from .services import Paystack, PaystackUnavailable
+from .tasks import (
+    credit_giveaway_winners,
+    drain_webhook_inbox,
+    populate_recipient_code_batch,
+    populate_recipient_codes,
+)
+
+
+@mock.patch("payments.views.schedule_webhook_drain")
+class PaystackWebhookViewTestCase(TestCase):
+    payload = {"event": "charge.success", "data": {"id": 302961, "reference": "ref"}}
+
+    def post_webhook(self, body: bytes, signature: str = None):
+        if signature is None:
+            signature = hmac.new(
+                settings.PAYSTACK_SECRET_KEY.encode("utf-8"), body, digestmod=hashlib.sha512
+            ).hexdigest()
+
+        return self.client.post(
+            reverse("payments:paystack-webhook"),
+            data=body,
+            content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def test_redeliveries_are_stored_once(self, schedule_webhook_drain):
+        body = json.dumps(self.payload).encode()
+
+        for _ in range(3):
+            self.assertEqual(self.post_webhook(body).status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.filter(key="charge.success:302961").count(), 1)
+
+    def test_events_without_an_id_are_keyed_by_their_body(self, schedule_webhook_drain):
+        bodies = [
+            json.dumps({"event": "transfer.success", "data": {"amount": amount}}).encode()
+            for amount in (1000, 2000, 1000)
+        ]
+
+        for body in bodies:
+            self.assertEqual(self.post_webhook(body).status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+        self.assertTrue(
+            WebhookEvent.objects.filter(key=hashlib.sha256(bodies[0]).hexdigest()).exists()
+        )
+
+    def test_malformed_events_are_bad_requests(self, schedule_webhook_drain):
+        for body in (b"not json", b"[]", json.dumps({"data": {"id": 1}}).encode()):
+            self.assertEqual(self.post_webhook(body).status_code, 400)
+
+        self.assertFalse(WebhookEvent.objects.exists())
+        schedule_webhook_drain.assert_not_called()
+
+    def test_unsigned_events_are_rejected(self, schedule_webhook_drain):
+        response = self.post_webhook(json.dumps(self.payload).encode(), signature="forged")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(WebhookEvent.objects.exists())
+        schedule_webhook_drain.assert_not_called()
+
+
+class TaskRoutingTestCase(SimpleTestCase):
+    def test_money_moving_tasks_have_their_own_queue(self):
+        for task in (drain_webhook_inbox, credit_giveaway_winners):
+            self.assertIs(task.huey, get_queue("payments"))
+            self.assertEqual(task.s().priority, TaskPriority.HIGH)
+
+        self.assertIsNot(populate_recipient_codes.huey, get_queue("payments"))
+
+
+@mock.patch("payments.tasks.Participant.objects.bulk_update")
+@mock.patch("payments.tasks.paystack_breaker", is_open=False)
+@mock.patch("payments.tasks.paystack")
+class RecipientProvisioningTestCase(SimpleTestCase):
+    def setUp(self):
+        self.participant = Participant(pk=1, account_number="0123456789", bank_code="058")
+
+    def test_failed_bulk_call_is_reported(self, paystack, paystack_breaker, bulk_update):
+        paystack.create_transfer_recipients.return_value = None
+
+        self.assertIsNone(populate_recipient_code_batch([self.participant]))
+        bulk_update.assert_not_called()
+
+    def test_rejected_participants_back_off(self, paystack, paystack_breaker, bulk_update):
+        paystack.create_transfer_recipients.return_value = {}
+        paystack.create_transfer_recipient.return_value = None
+        self.participant.recipient_attempts = 2
+
+        self.assertEqual(populate_recipient_code_batch([self.participant]), 0)
+
+        self.assertEqual(self.participant.recipient_attempts, 3)
+        self.assertGreater(self.participant.recipient_retry_at, timezone.now())
+        bulk_update.assert_called_once()
+
+    def test_open_breaker_does_not_use_up_attempts(self, paystack, paystack_breaker, bulk_update):
+        paystack.create_transfer_recipients.return_value = {}
+        paystack_breaker.is_open = True
+
+        populate_recipient_code_batch([self.participant])
+
+        paystack.create_transfer_recipient.assert_not_called()
+        self.assertEqual(self.participant.recipient_attempts, 0)
+
+
+class PaystackTopupCallbackViewTestCase(SimpleTestCase):
+    @mock.patch("payments.views.paystack.verify_transaction")
+    def test_unavailable_paystack_is_not_a_server_error(self, verify_transaction):
+        verify_transaction.side_effect = PaystackUnavailable("Paystack circuit is open")
+
+        response = self.client.get(reverse("payments:paystack-callback"), {"reference": "ref"})
+
+        self.assertRedirects(response, reverse("core:index"), fetch_redirect_response=False)
+
+    @mock.patch("payments.views.paystack.verify_transaction")
+    def test_unknown_transaction_is_not_a_server_error(self, verify_transaction):
+        verify_transaction.return_value = (False, "Transaction not found!", None)
+
+        response = self.client.get(reverse("payments:paystack-callback"), {"reference": "ref"})
+
+        self.assertRedirects(response, reverse("core:index"), fetch_redirect_response=False)
+
+
+class ResolveBankAccountHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so that a second call would reuse the first call's connection.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"status": True, "data": {"account_name": "JOHN DOE"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@mock.patch.object(Paystack, "get_cached_bank_account", return_value=None)
+@mock.patch.object(Paystack, "cache_bank_account", side_effect=lambda *args: (True, "JOHN DOE"))
+class AsyncResolveBankAccountTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ResolveBankAccountHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_calls_on_new_event_loops_succeed(self, cache_bank_account, get_cached_bank_account):
+        paystack = Paystack()
+
+        with override_settings(PAYSTACK_URL=f"http://127.0.0.1:{self.server.server_port}"):
+            # `async_to_sync` runs each call on a new event loop.
+            for _ in range(2):
+                self.assertEqual(
+                    async_to_sync(paystack.aresolve_bank_account)("0123456789", "058"),
+                    (True, "JOHN DOE"),
+                )
@@ -9,6 +9,11 @@ urlpatterns = [
         views.PaystackTopupCallbackView.as_view(),
         name="paystack-callback",
     ),
+    path(
+        "payments/paystack/topup/<slug>/",
+        views.PaystackTopupView.as_view(),
+        name="paystack-topup",
+    ),
     path(
         "payments/paystack/webhook/", views.PaystackWebhookView.as_view(), name="paystack-webhook"
     ),
@@ -1,13 +1,24 @@
+import hashlib
 import json
+import logging
 
 from django.contrib import messages
-from django.http.response import JsonResponse
-from django.shortcuts import redirect
+from django.contrib.auth.decorators import login_required
+from django.http.response import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.csrf import csrf_exempt
+from giveaways.enums import GiveawayStatus
+from giveaways.models import Giveaway
+from requests.exceptions import RequestException
 
+from .models import WebhookEvent
 from .services import paystack
-from .tasks import handle_webhook
+from .tasks import schedule_webhook_drain
+
+logger = logging.getLogger(__name__)
 
 
 class PaystackTopupCallbackView(generic.View):
@@ -15,26 +26,86 @@ class PaystackTopupCallbackView(generic.View):
         txn_ref = request.GET.get("reference")
 
         if txn_ref:
-            status, message, giveaway = paystack.verify_transaction(txn_ref)
-            print(status, message, giveaway.slug)
+            try:
+                status, message, giveaway = paystack.verify_transaction(txn_ref)
+            except RequestException as err:
+                # The webhook or `reconcile_transactions` confirms the top up once Paystack is back.
+                logger.exception(err)
+                messages.info(
+                    request,
+                    "We are unable to confirm your top up at the moment. "
+                    "Your giveaway will be activated as soon as it is confirmed.",
+                )
+                return redirect(reverse("core:index"))
+
+            logger.info(f"Top up {txn_ref} verified: {status}, {message}")
+            # Failed or unknown transactions come back without their giveaway.
+            if giveaway is None:
+                messages.error(request, message)
+                return redirect(reverse("core:index"))
+
             if status:
                 messages.success(request, message)
-                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
             else:
                 messages.error(request, message)
-                return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
+            return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
 
         # Something sus.
-        print("Invalid reference....", txn_ref)
+        logger.warning("Top up callback without a reference")
         return redirect(reverse("core:index"))
 
 
+@method_decorator(login_required, name="dispatch")
+class PaystackTopupView(generic.View):
+    def post(self, request, *args, **kwargs):
+        giveaway = get_object_or_404(
+            Giveaway.objects.select_related("monetary_prize", "creator"),
+            slug=kwargs.get("slug"),
+            creator=request.user,
+            status=GiveawayStatus.CREATED,
+        )
+
+        authorization_url = paystack.get_or_create_topup_url(giveaway)
+        if authorization_url:
+            return redirect(authorization_url)
+
+        messages.error(request, "Unable to start your top up at the moment. Please try again.")
+        return redirect(reverse("giveaways:view-giveaway", kwargs={"slug": giveaway.slug}))
+
+
+@method_decorator(csrf_exempt, name="dispatch")
 class PaystackWebhookView(generic.View):
+    """Persists the (already verified) event and acknowledges it, see `drain_webhook_inbox`."""
+
     def post(self, request, *args, **kwargs):
-        data = json.loads(request.body.decode("utf-8"))
+        try:
+            payload = json.loads(request.body)
+            event = payload["event"]
+            data = payload.get("data") or {}
+            event_id = data.get("id") or data.get("reference")
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return HttpResponseBadRequest()
+
+        if (
+            not isinstance(event, str)
+            or len(event) > WebhookEvent._meta.get_field("event").max_length
+        ):
+            return HttpResponseBadRequest()
 
-        print(data)
+        # Events without an id or reference are keyed by their body, which redeliveries repeat verbatim.
+        key = f"{event}:{event_id}" if event_id else hashlib.sha256(request.body).hexdigest()
 
-        handle_webhook(data)
+        # ON CONFLICT DO NOTHING, redeliveries of an event are acknowledged but never stored twice.
+        WebhookEvent.objects.bulk_create(
+            [
+                WebhookEvent(
+                    key=key,
+                    event=event,
+                    payload=payload,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        schedule_webhook_drain()
 
         return JsonResponse(data={})